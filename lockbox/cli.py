@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.cli
+-----------
+
+This module contains the ``lockbox`` command line tool, which can
+validate, summarize, export and search many BAI lockbox files at once.
+
+Files may be given as paths, glob patterns or directories (which are
+searched recursively), and are processed in parallel by a pool of
+worker processes. Results are written to standard output as JSON lines,
+one object per file (or per check for ``export`` and ``grep``), in the
+same order as the files were given.
+
+The exit status is one of:
+
+* ``0`` - every file was processed successfully
+* ``1`` - at least one file failed to parse or validate
+* ``2`` - the command line was invalid or no input files were found
+* ``3`` - ``grep`` found no matching checks
+
+'''
+
+import argparse
+import codecs
+import glob
+import json
+import multiprocessing
+import os
+import re
+import sys
+
+from .exceptions import LockboxError
+from .parser import LockboxFile
+
+
+EXIT_OK = 0
+EXIT_INVALID_FILE = 1
+EXIT_USAGE = 2
+EXIT_NO_MATCHES = 3
+
+GREP_FIELDS = ('sender', 'recipient', 'memo', 'number')
+
+
+def expand_paths(patterns):
+    '''Expand a list of paths, glob patterns and directories into a list
+    of file paths, preserving the order they were given in and dropping
+    duplicates.
+    '''
+    paths = []
+    seen = set()
+
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = []
+            for dirpath, dirnames, filenames in os.walk(pattern):
+                dirnames.sort()
+                matches.extend(
+                    os.path.join(dirpath, name) for name in sorted(filenames)
+                )
+        elif os.path.exists(pattern):
+            matches = [pattern]
+        else:
+            matches = sorted(
+                p for p in glob.glob(pattern) if not os.path.isdir(p)
+            )
+
+        for path in matches:
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+
+    return paths
+
+
+def _check_to_dict(path, lockbox, batch, check):
+    check_dict = check.to_dict()
+    check_dict.update({
+        'file': path,
+        'lockbox_number': lockbox.header_record.lockbox_number,
+        'deposit_date': lockbox.header_record.deposit_date.isoformat(),
+        'batch_number': batch.summary.batch_number,
+    })
+
+    return check_dict
+
+
+def _iter_checks(path, lockbox_file):
+    for lockbox in lockbox_file.lockboxes:
+        for batch in lockbox.batches:
+            for check in batch.checks:
+                yield _check_to_dict(path, lockbox, batch, check)
+
+
+def _validate(path, lockbox_file, options):
+    return [{'file': path, 'valid': True}]
+
+
+def _stats(path, lockbox_file, options):
+    batches = [b for lb in lockbox_file.lockboxes for b in lb.batches]
+
+    return [{
+        'file': path,
+        'lockboxes': len(lockbox_file.lockboxes),
+        'batches': len(batches),
+        'checks': sum(len(b.details) for b in batches),
+        'total_amount': round(
+            sum(b.summary.check_dollar_total for b in batches), 2
+        ),
+    }]
+
+
+def _export(path, lockbox_file, options):
+    return list(_iter_checks(path, lockbox_file))
+
+
+def _grep(path, lockbox_file, options):
+    flags = re.IGNORECASE if options['ignore_case'] else 0
+    patt = re.compile(options['pattern'], flags)
+    fields = options['fields'] or GREP_FIELDS
+
+    return [
+        check
+        for check in _iter_checks(path, lockbox_file)
+        if any(patt.search(str(check[field])) for field in fields)
+    ]
+
+
+COMMANDS = {
+    'validate': _validate,
+    'stats': _stats,
+    'export': _export,
+    'grep': _grep,
+}
+
+
+def process_file(job):
+    '''Run a single subcommand against a single file. ``job`` is a
+    ``(command, path, options)`` tuple so this can be handed straight
+    to :meth:`multiprocessing.pool.Pool.imap`.
+
+    Returns a ``(ok, results)`` tuple, where ``results`` is a list of
+    JSON-serializable dicts.
+    '''
+    command, path, options = job
+
+    try:
+        with open(path, 'rb') as inf:
+            lockbox_file = LockboxFile.from_bytes(
+                inf.read(),
+                encoding=options['encoding'],
+            )
+    except (LockboxError, IOError, OSError, UnicodeDecodeError) as e:
+        return False, [{'file': path, 'valid': False, 'error': str(e)}]
+
+    return True, COMMANDS[command](path, lockbox_file, options)
+
+
+def _add_common_arguments(parser):
+    parser.add_argument(
+        'paths',
+        nargs='+',
+        metavar='PATH',
+        help='lockbox files, glob patterns or directories',
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=None,
+        help='number of worker processes (default: number of CPUs)',
+    )
+    parser.add_argument(
+        '-e', '--encoding',
+        default='ascii',
+        help='encoding of the input files, e.g. cp037 for EBCDIC '
+             '(default: ascii)',
+    )
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(
+        prog='lockbox',
+        description='Validate, summarize, export and search BAI lockbox '
+                    'files.',
+    )
+    subparsers = arg_parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    _add_common_arguments(subparsers.add_parser(
+        'validate',
+        help='check that files parse and their totals are consistent',
+    ))
+    _add_common_arguments(subparsers.add_parser(
+        'stats',
+        help='print lockbox, batch and check counts for each file',
+    ))
+    _add_common_arguments(subparsers.add_parser(
+        'export',
+        help='print every check in every file',
+    ))
+
+    grep_parser = subparsers.add_parser(
+        'grep',
+        help='print checks matching a regular expression',
+    )
+    grep_parser.add_argument('pattern', help='regular expression to search for')
+    grep_parser.add_argument(
+        '-i', '--ignore-case',
+        action='store_true',
+        help='match case-insensitively',
+    )
+    grep_parser.add_argument(
+        '-f', '--field',
+        action='append',
+        dest='fields',
+        choices=GREP_FIELDS,
+        help='only search this check field (may be repeated)',
+    )
+    _add_common_arguments(grep_parser)
+
+    return arg_parser
+
+
+def main(argv=None):
+    arg_parser = build_arg_parser()
+    args = arg_parser.parse_args(argv)
+
+    try:
+        codecs.lookup(args.encoding)
+    except LookupError:
+        arg_parser.error('unknown encoding: {}'.format(args.encoding))
+
+    options = {'encoding': args.encoding}
+    if args.command == 'grep':
+        try:
+            re.compile(args.pattern)
+        except re.error as e:
+            arg_parser.error('invalid pattern: {}'.format(e))
+
+        options.update({
+            'pattern': args.pattern,
+            'ignore_case': args.ignore_case,
+            'fields': args.fields,
+        })
+
+    if args.jobs is not None and args.jobs < 1:
+        arg_parser.error('--jobs must be at least 1')
+
+    paths = expand_paths(args.paths)
+    if not paths:
+        sys.stderr.write('lockbox: no input files found\n')
+        return EXIT_USAGE
+
+    jobs = [(args.command, path, options) for path in paths]
+    num_workers = min(args.jobs or multiprocessing.cpu_count(), len(jobs))
+
+    pool = None
+    if num_workers > 1:
+        pool = multiprocessing.Pool(num_workers)
+        results = pool.imap(process_file, jobs)
+    else:
+        results = (process_file(job) for job in jobs)
+
+    all_ok = True
+    any_output = False
+
+    try:
+        for ok, records in results:
+            all_ok = all_ok and ok
+
+            for record in records:
+                any_output = any_output or ok
+                sys.stdout.write(json.dumps(record, sort_keys=True))
+                sys.stdout.write('\n')
+
+            sys.stdout.flush()
+    except BaseException:
+        # don't wait for the rest of the files to be parsed if the output
+        # has gone away or the user hit Ctrl-C
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+        raise
+
+    if pool is not None:
+        pool.close()
+        pool.join()
+
+    if not all_ok:
+        return EXIT_INVALID_FILE
+
+    if args.command == 'grep' and not any_output:
+        return EXIT_NO_MATCHES
+
+    return EXIT_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.diff
+------------
+
+This module compares two deliveries of the same lockbox file, such as an
+original and a corrected redelivery from the bank.
+
+Each detail (together with its overflow memo records), batch and lockbox
+is hashed from its raw record text, giving a tree of hashes. The two
+trees are compared from the top down, so lockboxes and batches whose
+hashes are equal are skipped without looking at any of their checks.
+
+'''
+
+import hashlib
+
+from collections import OrderedDict
+
+import six
+
+from .parser import Check
+
+
+def _digest(texts):
+    hasher = hashlib.sha1()
+
+    for text in texts:
+        if isinstance(text, six.text_type):
+            text = text.encode('utf-8')
+
+        hasher.update(text)
+        hasher.update(b'\n')
+
+    return hasher.digest()
+
+
+def _add_unique(index, key, value):
+    # keys should be unique, but if a bank sends duplicates keep them
+    # apart by the order they appear in
+    unique_key = key
+    occurrence = 1
+
+    while unique_key in index:
+        occurrence += 1
+        unique_key = key + (occurrence,)
+
+    index[unique_key] = value
+
+
+class _Node(object):
+    '''A node in the hash tree of a lockbox file: a lockbox, batch or
+    detail, its digest and, for lockboxes and batches, an index of its
+    children.
+    '''
+    def __init__(self, obj, digest, children=None):
+        self.obj = obj
+        self.digest = digest
+        self.children = children
+
+
+def _detail_node(detail):
+    return _Node(
+        detail,
+        _digest(
+            [detail.record.raw_record_text]
+            + [o.raw_record_text for o in detail.overflow_records]
+        ),
+    )
+
+
+def _batch_node(batch):
+    children = OrderedDict()
+    for detail in batch.details:
+        _add_unique(children, (detail.record.item_number,), _detail_node(detail))
+
+    return _Node(
+        batch,
+        _digest(
+            [batch.summary.raw_record_text]
+            + [node.digest for node in children.values()]
+        ),
+        children,
+    )
+
+
+def _lockbox_node(lockbox):
+    children = OrderedDict()
+    for batch in lockbox.batches:
+        _add_unique(children, (batch.summary.batch_number,), _batch_node(batch))
+
+    return _Node(
+        lockbox,
+        _digest(
+            [
+                lockbox.header_record.raw_record_text,
+                lockbox.total_record.raw_record_text,
+            ]
+            + [node.digest for node in children.values()]
+        ),
+        children,
+    )
+
+
+def _file_index(lockbox_file):
+    index = OrderedDict()
+    for lockbox in lockbox_file.lockboxes:
+        _add_unique(
+            index,
+            (
+                lockbox.header_record.lockbox_number,
+                lockbox.header_record._deposit_date_raw,
+            ),
+            _lockbox_node(lockbox),
+        )
+
+    return index
+
+
+class CheckChange(object):
+    '''A check which is in both files but differs between them.
+
+    * ``key`` - a ``(lockbox_number, deposit_date, batch_number,
+      item_number)`` tuple identifying the check, where ``deposit_date``
+      is in its raw ``YYMMDD`` form
+    * ``old`` - the :class:`~lockbox.parser.Check` in the old file
+    * ``new`` - the :class:`~lockbox.parser.Check` in the new file
+    * ``changes`` - a dict mapping the name of each field that changed
+      (as in :meth:`~lockbox.parser.Check.to_dict`) to an ``(old, new)``
+      tuple of its values
+
+    '''
+    def __init__(self, key, old, new, changes):
+        self.key = key
+        self.old = old
+        self.new = new
+        self.changes = changes
+
+
+class LockboxFileDiff(object):
+    '''The result of :func:`diff_files`.
+
+    * ``added`` - checks which are only in the new file
+    * ``removed`` - checks which are only in the old file
+    * ``modified`` - a list of :class:`CheckChange` objects for checks
+      which are in both files but differ
+
+    '''
+    def __init__(self):
+        self.added = []
+        self.removed = []
+        self.modified = []
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    __nonzero__ = __bool__
+
+
+def _diff_details(key, old_node, new_node, result):
+    old_check = Check(old_node.obj)
+    new_check = Check(new_node.obj)
+    old_fields = old_check.to_dict()
+    new_fields = new_check.to_dict()
+
+    changes = {
+        field: (old_fields[field], new_fields[field])
+        for field in old_fields
+        if old_fields[field] != new_fields[field]
+    }
+
+    # the raw records can differ in fields which aren't part of a
+    # check, such as overflow sequence numbers; those aren't reported
+    if changes:
+        result.modified.append(CheckChange(key, old_check, new_check, changes))
+
+
+def _diff_children(key, old_children, new_children, result, diff_child):
+    for child_key, old_node in six.iteritems(old_children):
+        new_node = new_children.get(child_key)
+
+        if new_node is None:
+            result.removed.extend(_all_checks(old_node))
+        elif new_node.digest != old_node.digest:
+            diff_child(key + child_key, old_node, new_node, result)
+
+    for child_key, new_node in six.iteritems(new_children):
+        if child_key not in old_children:
+            result.added.extend(_all_checks(new_node))
+
+
+def _all_checks(node):
+    if node.children is None:
+        return [Check(node.obj)]
+
+    return [
+        check
+        for child in node.children.values()
+        for check in _all_checks(child)
+    ]
+
+
+def _diff_batches(key, old_node, new_node, result):
+    _diff_children(
+        key,
+        old_node.children,
+        new_node.children,
+        result,
+        _diff_details,
+    )
+
+
+def _diff_lockboxes(key, old_node, new_node, result):
+    _diff_children(
+        key,
+        old_node.children,
+        new_node.children,
+        result,
+        _diff_batches,
+    )
+
+
+def diff_files(old, new):
+    '''Compare two :class:`~lockbox.parser.LockboxFile` objects, returning
+    a :class:`LockboxFileDiff` of the checks which were added, removed or
+    modified in ``new``.
+
+    Lockboxes are matched up by lockbox number and deposit date, batches
+    by batch number and checks by item number. Checks are only reported
+    as modified if a field of :meth:`~lockbox.parser.Check.to_dict`
+    changed.
+    '''
+    result = LockboxFileDiff()
+
+    _diff_children(
+        (),
+        _file_index(old),
+        _file_index(new),
+        result,
+        _diff_lockboxes,
+    )
+
+    return result
@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.filters
+---------------
+
+This module contains :class:`CheckFilter`, a declarative description of
+which checks to read from a lockbox file. Because the conditions are
+declared up front rather than applied to the parsed checks afterwards,
+the streaming parser can use them to skip whole lockboxes and batches
+without decoding their records.
+
+'''
+
+import six
+
+
+def _to_int_set(values):
+    if values is None:
+        return None
+
+    if isinstance(values, (six.integer_types, six.string_types)):
+        values = [values]
+
+    return frozenset(int(v) for v in values)
+
+
+def _to_cents(amount):
+    return None if amount is None else int(round(amount * 100))
+
+
+class CheckFilter(object):
+    '''A set of conditions a check must meet. Every condition which is
+    given must hold; conditions which are left as ``None`` always hold.
+
+    :param lockbox_numbers: A lockbox number, or an iterable of them.
+    :param batch_numbers: A batch number, or an iterable of them.
+    :param deposit_dates: A :class:`datetime.date`, or an iterable of
+                          them, which the lockbox must have been
+                          deposited on.
+    :param min_deposit_date: The earliest deposit date to include.
+    :param max_deposit_date: The latest deposit date to include.
+    :param min_amount: The smallest check amount to include, in dollars.
+    :param max_amount: The largest check amount to include, in dollars.
+    :param predicate: A callable which is passed each
+                      :class:`~lockbox.parser.Check` that meets all of
+                      the other conditions, and returns whether to
+                      include it.
+
+    '''
+    def __init__(self, lockbox_numbers=None, batch_numbers=None,
+                 deposit_dates=None, min_deposit_date=None,
+                 max_deposit_date=None, min_amount=None, max_amount=None,
+                 predicate=None):
+        self.lockbox_numbers = _to_int_set(lockbox_numbers)
+        self.batch_numbers = _to_int_set(batch_numbers)
+        self.deposit_dates = (
+            None
+            if deposit_dates is None
+            else frozenset(
+                [deposit_dates]
+                if hasattr(deposit_dates, 'year')
+                else deposit_dates
+            )
+        )
+        self.min_deposit_date = min_deposit_date
+        self.max_deposit_date = max_deposit_date
+        self.min_amount_cents = _to_cents(min_amount)
+        self.max_amount_cents = _to_cents(max_amount)
+        self.predicate = predicate
+
+    @classmethod
+    def coerce(cls, where):
+        '''Turn the ``where`` argument accepted by the streaming parser into
+        a :class:`CheckFilter`. It may already be one, or it may be a dict
+        of keyword arguments for one, a callable to use as the
+        ``predicate``, or ``None`` to include everything.
+        '''
+        if where is None:
+            return cls()
+        elif isinstance(where, cls):
+            return where
+        elif isinstance(where, dict):
+            return cls(**where)
+        elif callable(where):
+            return cls(predicate=where)
+
+        raise TypeError(
+            'where must be a CheckFilter, dict or callable, not {}'.format(
+                type(where).__name__,
+            )
+        )
+
+    @property
+    def filters_batches(self):
+        return self.batch_numbers is not None
+
+    @property
+    def filters_checks(self):
+        return (
+            self.min_amount_cents is not None
+            or self.max_amount_cents is not None
+            or self.predicate is not None
+        )
+
+    def matches_lockbox(self, header_record):
+        '''Whether any check in the lockbox with the given
+        :class:`~lockbox.records.LockboxDetailHeader` could match.
+        '''
+        if self.lockbox_numbers is not None:
+            if int(header_record.lockbox_number) not in self.lockbox_numbers:
+                return False
+
+        deposit_date = header_record.deposit_date
+
+        if self.deposit_dates is not None:
+            if deposit_date not in self.deposit_dates:
+                return False
+
+        if self.min_deposit_date is not None:
+            if deposit_date < self.min_deposit_date:
+                return False
+
+        if self.max_deposit_date is not None:
+            if deposit_date > self.max_deposit_date:
+                return False
+
+        return True
+
+    def matches_batch(self, batch_number):
+        return self.batch_numbers is None or batch_number in self.batch_numbers
+
+    def matches_check(self, check):
+        if (
+            self.min_amount_cents is not None
+            or self.max_amount_cents is not None
+        ):
+            amount_cents = _to_cents(check.amount)
+
+            if self.min_amount_cents is not None:
+                if amount_cents < self.min_amount_cents:
+                    return False
+
+            if self.max_amount_cents is not None:
+                if amount_cents > self.max_amount_cents:
+                    return False
+
+        return self.predicate is None or bool(self.predicate(check))
@@ -0,0 +1,354 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.ingest
+--------------
+
+This module contains an ingestion service which watches a local
+"inbox" directory for newly delivered BAI lockbox files and parses them
+with a bounded pool of worker threads.
+
+Every successfully processed file has the SHA-256 hash of its contents
+appended to a durable checkpoint file, so that after a restart files
+which have already been processed are skipped rather than re-parsed.
+Files which fail to parse are moved into a quarantine directory along
+with a ``.error`` file describing the problem.
+
+'''
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+
+from six.moves import queue
+
+from .exceptions import LockboxError
+from .parser import LockboxFile
+
+
+logger = logging.getLogger(__name__)
+
+
+class Checkpoint(object):
+    '''An append-only, fsync'ed log of the hashes of files which have
+    been processed. Each line of the file is a JSON object with the
+    ``sha256`` of the file's contents and the ``name`` it was delivered
+    under.
+    '''
+    def __init__(self, path):
+        self.path = path
+        self.hashes = set()
+        self.lock = threading.Lock()
+
+        if os.path.exists(path):
+            with open(path, 'r') as inf:
+                for line in inf:
+                    line = line.strip()
+                    if not line:
+                        continue
+
+                    try:
+                        self.hashes.add(json.loads(line)['sha256'])
+                    except (ValueError, KeyError):
+                        # a torn final write from a crash; everything
+                        # before it is still valid
+                        logger.warning(
+                            'ignoring corrupt checkpoint entry in %s', path,
+                        )
+
+    def __contains__(self, file_hash):
+        with self.lock:
+            return file_hash in self.hashes
+
+    def __len__(self):
+        with self.lock:
+            return len(self.hashes)
+
+    def add(self, file_hash, name):
+        with self.lock:
+            if file_hash in self.hashes:
+                return
+
+            with open(self.path, 'a') as outf:
+                outf.write(json.dumps({'sha256': file_hash, 'name': name}))
+                outf.write('\n')
+                outf.flush()
+                os.fsync(outf.fileno())
+
+            self.hashes.add(file_hash)
+
+
+class InboxWatcher(object):
+    '''Watches ``inbox_dir`` for new lockbox files and parses each one
+    on a pool of ``num_workers`` threads.
+
+    :param inbox_dir: The directory new files are delivered to.
+    :param checkpoint_path: Path of the checkpoint log of processed
+                            file hashes.
+    :param quarantine_dir: Directory that files which fail to parse are
+                           moved to.
+    :param handler: A callable which is passed the path and the parsed
+                    :class:`~lockbox.parser.LockboxFile` of every
+                    successfully parsed file. If it raises, the file is
+                    not checkpointed and will be retried on the next
+                    scan.
+    :param processed_dir: If given, successfully processed files are
+                          moved here; otherwise they are left in the
+                          inbox.
+    :param num_workers: Number of worker threads.
+    :param max_queue_size: Maximum number of files waiting to be
+                           processed. :meth:`scan` blocks once the queue
+                           is full.
+    :param poll_interval: Seconds between scans in :meth:`run_forever`.
+    :param encoding: The codec delivered files are encoded with.
+    :param min_file_age: Files modified more recently than this many
+                         seconds ago are assumed to still be being
+                         written and are left for a later scan.
+    '''
+    def __init__(self, inbox_dir, checkpoint_path, quarantine_dir,
+                 handler=None, processed_dir=None, num_workers=4,
+                 max_queue_size=100, poll_interval=5.0, encoding='ascii',
+                 min_file_age=2.0):
+        self.inbox_dir = inbox_dir
+        self.quarantine_dir = quarantine_dir
+        self.processed_dir = processed_dir
+        self.handler = handler
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.encoding = encoding
+        self.min_file_age = min_file_age
+
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.queue = queue.Queue(maxsize=max_queue_size)
+
+        self.workers = []
+        self.stopping = threading.Event()
+
+        self.lock = threading.Lock()
+        # paths which are queued or being processed, and the (mtime,
+        # size) of files already found in the checkpoint so that they
+        # aren't re-hashed on every scan
+        self.in_flight = set()
+        self.seen = {}
+        # hashes of files which are being parsed and handled but haven't
+        # been added to the checkpoint yet
+        self.in_progress_hashes = set()
+
+        self.num_processed = 0
+        self.num_quarantined = 0
+        self.num_failed = 0
+        self.num_duplicates = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_latency = None
+
+    def start(self):
+        for d in (self.quarantine_dir, self.processed_dir):
+            if d is not None and not os.path.isdir(d):
+                os.makedirs(d)
+
+        self.stopping.clear()
+
+        while len(self.workers) < self.num_workers:
+            worker = threading.Thread(target=self._work)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def stop(self):
+        '''Stop the watcher once all of the files which have already been
+        queued have been processed.
+        '''
+        self.stopping.set()
+
+        for _ in self.workers:
+            self.queue.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+        self.workers = []
+
+    def join(self):
+        '''Block until every queued file has been processed.'''
+        self.queue.join()
+
+    def scan(self):
+        '''Queue every new file in the inbox for processing, returning the
+        number of files queued.
+        '''
+        now = time.time()
+        num_queued = 0
+
+        for name in sorted(os.listdir(self.inbox_dir)):
+            path = os.path.join(self.inbox_dir, name)
+
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # the file disappeared from under us
+                continue
+
+            if now - stat.st_mtime < self.min_file_age:
+                continue
+
+            with self.lock:
+                if path in self.in_flight:
+                    continue
+
+                if self.seen.get(path) == (stat.st_mtime, stat.st_size):
+                    continue
+
+                self.in_flight.add(path)
+
+            self.queue.put((path, time.time()))
+            num_queued += 1
+
+        return num_queued
+
+    def run_forever(self):
+        self.start()
+
+        try:
+            while not self.stopping.is_set():
+                self.scan()
+                self.stopping.wait(self.poll_interval)
+        finally:
+            self.stop()
+
+    def metrics(self):
+        with self.lock:
+            num_done = self.num_processed + self.num_quarantined
+
+            return {
+                'queue_depth': self.queue.qsize(),
+                'in_flight': len(self.in_flight),
+                'processed': self.num_processed,
+                'quarantined': self.num_quarantined,
+                'failed': self.num_failed,
+                'duplicates': self.num_duplicates,
+                'checkpointed': len(self.checkpoint),
+                'last_latency': self.last_latency,
+                'max_latency': self.max_latency,
+                'mean_latency': (
+                    self.total_latency / num_done if num_done else None
+                ),
+            }
+
+    def _work(self):
+        while True:
+            item = self.queue.get()
+
+            try:
+                if item is None:
+                    return
+
+                path, queued_at = item
+                self._process(path, queued_at)
+            except Exception:
+                logger.exception('unexpected error processing %s', item[0])
+            finally:
+                self.queue.task_done()
+
+    def _process(self, path, queued_at):
+        outcome = 'failed'
+        reserved_hash = None
+
+        try:
+            stat = os.stat(path)
+            with open(path, 'rb') as inf:
+                data = inf.read()
+
+            file_hash = hashlib.sha256(data).hexdigest()
+
+            # reserve the hash before parsing, so that two copies of a
+            # file picked up by the same scan aren't both handled
+            with self.lock:
+                is_duplicate = (
+                    file_hash in self.in_progress_hashes
+                    or file_hash in self.checkpoint
+                )
+                if not is_duplicate:
+                    reserved_hash = file_hash
+                    self.in_progress_hashes.add(file_hash)
+
+            if is_duplicate:
+                outcome = 'duplicate'
+                self._finish(path, stat)
+                return
+
+            try:
+                lockbox_file = LockboxFile.from_bytes(
+                    data,
+                    encoding=self.encoding,
+                )
+            except (LockboxError, UnicodeDecodeError) as e:
+                outcome = 'quarantined'
+                self._quarantine(path, e)
+                return
+
+            if self.handler is not None:
+                self.handler(path, lockbox_file)
+
+            self.checkpoint.add(file_hash, os.path.basename(path))
+            outcome = 'processed'
+            self._finish(path, stat)
+        finally:
+            if reserved_hash is not None:
+                with self.lock:
+                    self.in_progress_hashes.discard(reserved_hash)
+
+            self._record(path, outcome, time.time() - queued_at)
+
+    def _finish(self, path, stat):
+        if self.processed_dir is not None:
+            shutil.move(path, self._unique_path(self.processed_dir, path))
+        else:
+            with self.lock:
+                self.seen[path] = (stat.st_mtime, stat.st_size)
+
+    def _quarantine(self, path, error):
+        dest = self._unique_path(self.quarantine_dir, path)
+        shutil.move(path, dest)
+
+        with open(dest + '.error', 'w') as outf:
+            outf.write('{}\n'.format(error))
+
+        logger.warning('quarantined %s: %s', path, error)
+
+    def _unique_path(self, dest_dir, path):
+        name = os.path.basename(path)
+        dest = os.path.join(dest_dir, name)
+
+        suffix = 1
+        while os.path.exists(dest):
+            dest = os.path.join(dest_dir, '{}.{}'.format(name, suffix))
+            suffix += 1
+
+        return dest
+
+    def _record(self, path, outcome, latency):
+        with self.lock:
+            self.in_flight.discard(path)
+
+            if outcome == 'duplicate':
+                self.num_duplicates += 1
+                return
+            elif outcome == 'failed':
+                self.num_failed += 1
+                return
+            elif outcome == 'processed':
+                self.num_processed += 1
+            else:
+                self.num_quarantined += 1
+
+            self.last_latency = latency
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
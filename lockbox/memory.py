@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.memory
+--------------
+
+This module measures how much memory parsed lockbox files take up, so
+that worker pools can be sized and growth in the size of records can
+be caught.
+
+:func:`measure_memory` walks a parsed
+:class:`~lockbox.parser.LockboxFile` and attributes every byte it
+retains to the record or container object that owns it.
+:func:`trace_parse` uses :mod:`tracemalloc` to measure what parsing
+actually allocates, including temporary objects.
+
+'''
+
+import sys
+import types
+
+from collections import defaultdict
+
+import six
+
+from .parser import (
+    Lockbox,
+    LockboxBatch,
+    LockboxDetail,
+    LockboxFile,
+)
+from .records import LockboxBaseRecord, LockboxDetailRecord
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+# objects of these types are reported separately; everything else they
+# refer to is counted towards them
+OWNER_TYPES = (
+    LockboxBaseRecord,
+    LockboxDetail,
+    LockboxBatch,
+    Lockbox,
+    LockboxFile,
+)
+
+# objects which are shared rather than owned by whatever refers to them
+_SHARED_TYPES = six.class_types + (
+    bool,
+    type(None),
+    types.BuiltinFunctionType,
+    types.FunctionType,
+    types.ModuleType,
+)
+
+
+class MemoryReport(object):
+    '''The result of :func:`measure_memory`.
+
+    * ``total_bytes`` - the number of bytes retained by the file
+    * ``bytes_by_class`` - a dict of the bytes retained by each record or
+      container class, by class name
+    * ``count_by_class`` - a dict of the number of instances of each of
+      those classes
+    * ``raw_text_bytes`` - the number of bytes taken up by the raw text
+      of the records
+    * ``num_checks`` - the number of checks in the file
+
+    '''
+    def __init__(self):
+        self.total_bytes = 0
+        self.bytes_by_class = defaultdict(int)
+        self.count_by_class = defaultdict(int)
+        self.raw_text_bytes = 0
+        self.num_checks = 0
+
+    def bytes_per_instance(self, cls):
+        '''The average number of bytes retained by each instance of
+        ``cls``.
+        '''
+        count = self.count_by_class.get(cls.__name__, 0)
+        if not count:
+            return 0
+
+        return self.bytes_by_class[cls.__name__] / float(count)
+
+    @property
+    def bytes_per_check(self):
+        '''The average number of bytes retained by the whole file for each
+        check it contains.
+        '''
+        if not self.num_checks:
+            return 0
+
+        return self.total_bytes / float(self.num_checks)
+
+    def to_dict(self):
+        return {
+            'total_bytes': self.total_bytes,
+            'bytes_by_class': dict(self.bytes_by_class),
+            'count_by_class': dict(self.count_by_class),
+            'raw_text_bytes': self.raw_text_bytes,
+            'num_checks': self.num_checks,
+            'bytes_per_check': self.bytes_per_check,
+        }
+
+
+def _referents(obj):
+    if isinstance(obj, dict):
+        for key, value in six.iteritems(obj):
+            yield key
+            yield value
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            yield item
+
+    obj_dict = getattr(obj, '__dict__', None)
+    if isinstance(obj_dict, dict):
+        yield obj_dict
+
+
+def measure_memory(lockbox_file):
+    '''Return a :class:`MemoryReport` of the memory retained by a parsed
+    :class:`~lockbox.parser.LockboxFile`.
+
+    Every object reachable from the file is counted exactly once, towards
+    the nearest record or container object (see :data:`OWNER_TYPES`)
+    that refers to it. Classes, modules, functions and other shared
+    objects aren't counted.
+    '''
+    report = MemoryReport()
+    seen = set()
+
+    # an explicit stack rather than recursion, since large files are
+    # deeply nested lists of objects
+    stack = [(lockbox_file, type(lockbox_file).__name__)]
+
+    while stack:
+        obj, owner = stack.pop()
+
+        if id(obj) in seen or isinstance(obj, _SHARED_TYPES):
+            continue
+
+        seen.add(id(obj))
+
+        if isinstance(obj, OWNER_TYPES):
+            owner = type(obj).__name__
+            report.count_by_class[owner] += 1
+
+            if isinstance(obj, LockboxDetailRecord):
+                report.num_checks += 1
+
+            if isinstance(obj, LockboxBaseRecord):
+                raw_text = obj.raw_record_text
+                if id(raw_text) not in seen:
+                    report.raw_text_bytes += sys.getsizeof(raw_text)
+
+        size = sys.getsizeof(obj)
+        report.total_bytes += size
+        report.bytes_by_class[owner] += size
+
+        for referent in _referents(obj):
+            stack.append((referent, owner))
+
+    return report
+
+
+def trace_parse(parse, *args, **kwargs):
+    '''Call ``parse(*args, **kwargs)`` (for example
+    :meth:`~lockbox.parser.LockboxFile.from_lines`) while tracing memory
+    allocations, returning a ``(result, retained_bytes, peak_bytes)``
+    tuple. ``retained_bytes`` is the memory still allocated once parsing
+    has finished and ``peak_bytes`` the most that was allocated at any
+    point during parsing.
+    '''
+    if tracemalloc is None:
+        raise RuntimeError('tracemalloc is not available')
+
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+
+    try:
+        start_bytes, _ = tracemalloc.get_traced_memory()
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+
+        result = parse(*args, **kwargs)
+
+        end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+    return result, end_bytes - start_bytes, peak_bytes - start_bytes
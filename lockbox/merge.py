@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.merge
+-------------
+
+This module merges the checks from many lockbox files into a single
+chronological stream.
+
+Each file is read lazily with a :class:`~lockbox.parser.LockboxReader`,
+and the files are combined with a heap-based k-way merge, so at most one
+parsed batch per file is held in memory at a time no matter how many
+checks the files contain in total. Files given by path are decoded and
+split into records up front, as :meth:`~lockbox.parser.LockboxFile.from_bytes`
+does, so their raw text is held until the merge finishes with them.
+
+'''
+
+import heapq
+
+import six
+
+from .exceptions import LockboxConsistencyError
+from .filters import CheckFilter
+from .parser import LockboxReader, split_records
+
+
+def _iter_keyed_checks(source, where, validate, encoding):
+    if isinstance(source, six.string_types):
+        # decode and split the file as LockboxFile.from_bytes does, so
+        # that EBCDIC line endings and fixed-length records work too
+        with open(source, 'rb') as inf:
+            lines = split_records(inf.read().decode(encoding))
+
+        for item in _iter_keyed_checks(lines, where, validate, encoding):
+            yield item
+        return
+
+    last_key = None
+    reader = LockboxReader(source, where=where, validate=validate)
+
+    for lockbox_header, batch in reader.batches():
+        for check in batch.checks:
+            if not where.matches_check(check):
+                continue
+
+            key = (lockbox_header.deposit_date, check.date)
+            if last_key is not None and key < last_key:
+                raise LockboxConsistencyError(
+                    'checks in {} are not sorted by deposit date and check '
+                    'date (check {} deposited {} dated {})'.format(
+                        getattr(source, 'name', 'source'),
+                        check.number,
+                        key[0],
+                        key[1],
+                    )
+                )
+
+            last_key = key
+            yield key, check
+
+
+def merge_checks(sources, where=None, validate=True, encoding='ascii'):
+    '''
+    Lazily yield the :class:`~lockbox.parser.Check` objects from many
+    lockbox files in order of deposit date and then check date. The checks
+    in each individual file must already be in that order, which is
+    verified as they are read.
+
+    Checks with the same deposit date and check date are yielded in the
+    order their files were given in.
+
+    :param sources: Paths of files, :class:`File`-like objects, or
+                    iterables of lines.
+    :param where: Only include checks matching this filter, as for
+                  :func:`~lockbox.parser.iter_checks`.
+    :param validate: Whether to check batch and lockbox totals.
+    :param encoding: The codec files given by path are encoded with.
+                     Those files are read and decoded whole, and may
+                     have any of the line endings, or fixed-length
+                     records, that
+                     :meth:`~lockbox.parser.LockboxFile.from_bytes`
+                     accepts.
+
+    '''
+    where = CheckFilter.coerce(where)
+    streams = [
+        _iter_keyed_checks(source, where, validate, encoding)
+        for source in sources
+    ]
+
+    try:
+        heap = []
+        for stream_num, stream in enumerate(streams):
+            item = next(stream, None)
+            if item is not None:
+                heap.append((item[0], stream_num, item[1]))
+
+        heapq.heapify(heap)
+
+        while heap:
+            _, stream_num, check = heap[0]
+            yield check
+
+            item = next(streams[stream_num], None)
+            if item is None:
+                heapq.heappop(heap)
+            else:
+                heapq.heapreplace(heap, (item[0], stream_num, item[1]))
+    finally:
+        for stream in streams:
+            stream.close()
@@ -9,8 +9,11 @@ BAI lockbox file into its constituent records.
 
 '''
 
+import json
 import six
-import sys
+
+from multiprocessing import cpu_count
+from multiprocessing.pool import ThreadPool
 
 from .exceptions import (
     LockboxConsistencyError,
@@ -18,6 +21,7 @@ from .exceptions import (
     LockboxParseError,
 )
 
+from .filters import CheckFilter
 from .records import (
     LockboxBatchTotalRecord,
     LockboxDestinationTrailerRecord,
@@ -29,7 +33,155 @@ from .records import (
     LockboxServiceTotalRecord,
 )
 
-class Check(object):
+
+RECORD_TYPE_TO_CONSTRUCTOR = {
+    rec_class.RECORD_TYPE_NUM: rec_class
+    for rec_class in (
+        LockboxBatchTotalRecord,
+        LockboxDestinationTrailerRecord,
+        LockboxDetailHeader,
+        LockboxDetailOverflowRecord,
+        LockboxDetailRecord,
+        LockboxImmediateAddressHeader,
+        LockboxServiceRecord,
+        LockboxServiceTotalRecord,
+    )
+}
+
+
+# characters which end records in files with line endings; str.splitlines
+# splits on each of them
+LINE_BREAKS = ('\n', '\r', u'\x85')
+
+
+def split_records(text, record_length=None):
+    '''Split the decoded contents of a lockbox file into records.
+
+    Files with CRLF, LF or CR line endings, or the EBCDIC NL character
+    (which decodes to U+0085), are split on those. Files with no line
+    endings at all are assumed to be made up of fixed-length
+    records. If ``record_length`` isn't given it is taken from the
+    ``record_size`` field of the service record, which always
+    immediately follows the (fixed-length) immediate address header.
+    '''
+    if any(line_break in text for line_break in LINE_BREAKS):
+        return text.splitlines()
+
+    text = text.rstrip()
+    if not text:
+        return []
+
+    if record_length is None:
+        record_length = _detect_record_length(text)
+
+    return [
+        text[start:start + record_length]
+        for start in range(0, len(text), record_length)
+    ]
+
+
+def _detect_record_length(text):
+    service_rec_type = str(LockboxServiceRecord.RECORD_TYPE_NUM)
+    start_col, end_col = LockboxServiceRecord.fields['record_size']['location']
+
+    for record_length in range(1, LockboxServiceRecord.MAX_RECORD_LENGTH + 1):
+        if text[record_length:record_length + 1] != service_rec_type:
+            continue
+
+        record_size = text[record_length + start_col:record_length + end_col]
+        if record_size.isdigit() and int(record_size) == record_length:
+            return record_length
+
+    raise LockboxParseError(
+        'could not determine record length of file without line endings'
+    )
+
+
+def _yymmdd_to_iso(raw):
+    return '20{}-{}-{}'.format(raw[0:2], raw[2:4], raw[4:6])
+
+
+def _mmddyy_to_iso(raw):
+    return '20{}-{}-{}'.format(raw[4:6], raw[0:2], raw[2:4])
+
+
+def _cents_to_dollars(raw):
+    return int(raw) / 100.0
+
+
+# How each field of a serialized check is produced from the
+# LockboxDetailRecord it came from: its output key, the record
+# attribute it is read from, and a function to convert the attribute's
+# value (or None to use it as is). Dates and amounts are converted from
+# their raw text, so no datetime objects are built.
+CHECK_SCHEMA = (
+    ('sender', 'remitter_name', None),
+    ('recipient', 'payee_name', None),
+    ('date', '_check_date_raw', _mmddyy_to_iso),
+    ('number', 'check_number', None),
+    ('amount', '_check_amount_raw', _cents_to_dollars),
+    ('amount_cents', '_check_amount_raw', int),
+    ('sender_routing_number', 'transit_routing_number', None),
+    ('sender_account_number', 'dd_account_number', None),
+)
+
+
+def _detail_to_dict(detail):
+    record_attrs = detail.record.__dict__
+
+    check_dict = {
+        key: (
+            record_attrs[attr]
+            if convert is None
+            else convert(record_attrs[attr])
+        )
+        for key, attr, convert in CHECK_SCHEMA
+    }
+    check_dict['memo'] = ''.join(o.memo_line for o in detail.overflow_records)
+
+    return check_dict
+
+
+def _iter_json_object(fields, children_key, children):
+    '''Yield the JSON encoding of a dict made up of ``fields`` plus a
+    list under ``children_key``, a piece at a time so that large lists
+    never have to be encoded in one go. ``children`` is an iterable of
+    iterables of the JSON chunks of each element of the list.
+    '''
+    head = json.dumps(fields, sort_keys=True)[:-1]
+    yield '{}{}{}: ['.format(
+        head,
+        ', ' if fields else '',
+        json.dumps(children_key),
+    )
+
+    for i, child_chunks in enumerate(children):
+        if i:
+            yield ', '
+
+        for chunk in child_chunks:
+            yield chunk
+
+    yield ']}'
+
+
+class JSONSerializable(object):
+    '''Mixin providing :meth:`to_json` and :meth:`dump_json` for
+    objects that implement :meth:`iter_json`.
+    '''
+    def to_json(self):
+        '''Return this object encoded as a JSON string.'''
+        return ''.join(self.iter_json())
+
+    def dump_json(self, outf):
+        '''Write this object, encoded as JSON, to the :class:`File`-like
+        object ``outf`` without building the whole string in memory.
+        '''
+        for chunk in self.iter_json():
+            outf.write(chunk)
+
+
+class Check(JSONSerializable):
     '''The :class:`Check` object holds all of the actual information
     about a check. Specifically, it has the following fields:
 
@@ -46,14 +198,28 @@ class Check(object):
 
     '''
     def __init__(self, detail):
-        self.sender = detail.remitter_name
-        self.recipient = detail.payee_name
-        self.date = detail.check_date
-        self.number = detail.check_number
-        self.amount = detail.check_amount
+        record = detail.record
+
+        self._detail = detail
+        self.sender = record.remitter_name
+        self.recipient = record.payee_name
+        self.date = record.check_date
+        self.number = record.check_number
+        self.amount = record.check_amount
         self.memo = detail.memo
-        self.sender_routing_number = detail.transit_routing_number
-        self.sender_account_number = detail.dd_account_number
+        self.sender_routing_number = record.transit_routing_number
+        self.sender_account_number = record.dd_account_number
+
+    def to_dict(self):
+        '''Return a dict of the check's fields containing only strings,
+        numbers and ``None``, suitable for encoding as JSON or msgpack.
+        Dates are formatted as ``YYYY-MM-DD``, and the amount is given
+        both in dollars and as an integer number of cents.
+        '''
+        return _detail_to_dict(self._detail)
+
+    def iter_json(self):
+        yield json.dumps(self.to_dict(), sort_keys=True)
 
 
 class LockboxDetail(object):
@@ -65,24 +231,17 @@ class LockboxDetail(object):
     def memo(self):
         return ''.join(o.memo_line for o in self.overflow_records)
 
-    def add_record(self, record):
-        if isinstance(record, LockboxDetailRecord):
-            self.record = record
-        elif isinstance(record, LockboxDetailOverflowRecord):
-            self.overflow_records.append(record)
-        else:
-            raise LockboxParseError(
-                'expected lockbox detail overflow record'
-            )
-
     def __getattr__(self, attr):
-        if attr in dir(self.record):
-            return getattr(self.record, attr)
-        else:
-            return super(LockboxDetail, self).__getattr__(attr)
+        # only called for attributes a LockboxDetail doesn't have itself.
+        # 'record' is excluded so that objects which haven't been through
+        # __init__ (e.g. while unpickling) don't recurse forever.
+        if attr == 'record':
+            raise AttributeError(attr)
+
+        return getattr(self.record, attr)
 
 
-class LockboxBatch(object):
+class LockboxBatch(JSONSerializable):
     def __init__(self):
         self.details = []
         self.cur_detail = None
@@ -92,18 +251,49 @@ class LockboxBatch(object):
     def checks(self):
         return [Check(d) for d in self.details]
 
+    def _summary_dict(self):
+        summary = self.summary
+        total_cents = int(summary._check_dollar_total_raw)
+
+        return {
+            'batch_number': summary.batch_number,
+            'deposit_date': _yymmdd_to_iso(summary._deposit_date_raw),
+            'total_amount': total_cents / 100.0,
+            'total_amount_cents': total_cents,
+        }
+
+    def to_dict(self):
+        batch_dict = self._summary_dict()
+        batch_dict['checks'] = [_detail_to_dict(d) for d in self.details]
+
+        return batch_dict
+
+    def iter_json(self):
+        return _iter_json_object(
+            self._summary_dict(),
+            'checks',
+            (
+                [json.dumps(_detail_to_dict(d), sort_keys=True)]
+                for d in self.details
+            ),
+        )
+
     def validate(self):
         if self.summary is None:
             raise LockboxParseError(
                 'batch summary record expected'
             )
 
-        checks_sum = sum(d.check_amount for d in self.details)
-        if checks_sum != self.summary.check_dollar_total:
+        # compare totals in cents, as sums of float dollar amounts
+        # accumulate rounding errors
+        checks_cents = sum(
+            int(d.record._check_amount_raw) for d in self.details
+        )
+        if checks_cents != int(self.summary._check_dollar_total_raw):
             raise LockboxConsistencyError(
                 'batch expected dollar total ({}) does not match actual total'
                 ' ({})'.format(
-                    checks_sum,
+                    checks_cents / 100.0,
                     self.summary.check_dollar_total,
                 )
             )
@@ -117,30 +307,23 @@ class LockboxBatch(object):
                 )
             )
 
-    def add_record(self, record):
-        if isinstance(record, LockboxDetailRecord):
-            if self.cur_detail is not None:
-                self.details.append(self.cur_detail)
-
-            self.cur_detail = LockboxDetail()
-            self.cur_detail.record = record
-        elif isinstance(record, LockboxBatchTotalRecord):
-            if self.summary is not None:
-                raise LockboxParseError(
-                    'unexpected additional lockbox batch total record found'
-                )
+    # the order records may be added in is enforced by the TRANSITIONS
+    # table, so these don't check it themselves
 
-            self.summary = record
+    def add_detail_record(self, record):
+        self.cur_detail = LockboxDetail()
+        self.cur_detail.record = record
+        self.details.append(self.cur_detail)
 
-            if self.cur_detail is not None:
-                self.details.append(self.cur_detail)
+    def add_detail_overflow_record(self, record):
+        self.cur_detail.overflow_records.append(record)
 
-            self.cur_detail = LockboxDetail()
-        else:
-            self.cur_detail.add_record(record)
+    def set_summary(self, record):
+        self.summary = record
+        self.cur_detail = None
 
 
-class Lockbox(object):
+class Lockbox(JSONSerializable):
     def __init__(self):
         self.header_record = None
         self.total_record = None
@@ -157,6 +340,32 @@ class Lockbox(object):
 
         return checks
 
+    def _summary_dict(self):
+        total_cents = int(self.total_record._check_dollar_total_raw)
+
+        return {
+            'lockbox_number': self.header_record.lockbox_number,
+            'deposit_date': _yymmdd_to_iso(
+                self.header_record._deposit_date_raw
+            ),
+            'total_num_checks': self.total_record.total_num_checks,
+            'total_amount': total_cents / 100.0,
+            'total_amount_cents': total_cents,
+        }
+
+    def to_dict(self):
+        lockbox_dict = self._summary_dict()
+        lockbox_dict['batches'] = [b.to_dict() for b in self.batches]
+
+        return lockbox_dict
+
+    def iter_json(self):
+        return _iter_json_object(
+            self._summary_dict(),
+            'batches',
+            (b.iter_json() for b in self.batches),
+        )
+
     def validate(self):
         if self.total_record is None:
             raise LockboxConsistencyError('missing service total record')
@@ -172,8 +381,8 @@ class Lockbox(object):
             for batch
             in self.batches
         )
-        dollar_total = sum(
-            batch.summary.check_dollar_total
+        cents_total = sum(
+            int(batch.summary._check_dollar_total_raw)
             for batch
             in self.batches
         )
@@ -184,23 +393,179 @@ class Lockbox(object):
                 ' number'.format(self.total_record.lockbox_number)
             )
 
-        if self.total_record.check_dollar_total != dollar_total:
+        if int(self.total_record._check_dollar_total_raw) != cents_total:
             raise LockboxConsistencyError(
                 'expected dollar total for lockbox {} does not match actual'
                 ' total'.format(self.total_record.lockbox_number)
             )
 
-    def add_record(self, record):
-        if isinstance(record, LockboxBatchTotalRecord):
-            self.cur_batch.add_record(record)
-            self.cur_batch.validate()
-            self.batches.append(self.cur_batch)
-            self.cur_batch = LockboxBatch()
-        else:
-            self.cur_batch.add_record(record)
 
+# The parser is a state machine. Each state is named after the last
+# structural element that was read, and TRANSITIONS maps a ``(state,
+# record type character)`` pair to the record class to construct, the
+# function which adds the record to the LockboxFile being built, and the
+# next state, so that reading a line costs a single dict lookup.
+STATE_START = 'start'
+STATE_FILE_HEADER = 'file header'
+STATE_SERVICE = 'service record'
+STATE_LOCKBOX = 'lockbox'
+STATE_DETAIL = 'detail'
+STATE_LOCKBOX_END = 'lockbox end'
+STATE_END = 'end'
+
+# states it's an error for a file to end in, since they would leave a
+# lockbox half-read
+UNFINISHED_STATES = frozenset([STATE_LOCKBOX, STATE_DETAIL])
+
+RECORD_TYPE_NAMES = {
+    str(LockboxImmediateAddressHeader.RECORD_TYPE_NUM): 'immediate address header',
+    str(LockboxServiceRecord.RECORD_TYPE_NUM): 'service record',
+    str(LockboxDetailOverflowRecord.RECORD_TYPE_NUM): 'detail overflow record',
+    str(LockboxDetailHeader.RECORD_TYPE_NUM): 'detail header',
+    str(LockboxDetailRecord.RECORD_TYPE_NUM): 'detail record',
+    str(LockboxBatchTotalRecord.RECORD_TYPE_NUM): 'batch total record',
+    str(LockboxServiceTotalRecord.RECORD_TYPE_NUM): 'service total record',
+    str(LockboxDestinationTrailerRecord.RECORD_TYPE_NUM): 'destination trailer record',
+}
+
+
+def _add_immediate_address_header(lockbox_file, record):
+    lockbox_file.header_record = record
+
+
+def _add_service_record(lockbox_file, record):
+    lockbox_file.service_record = record
+
+
+def _add_detail_header(lockbox_file, record):
+    lockbox_file.cur_lockbox = Lockbox()
+    lockbox_file.cur_lockbox.header_record = record
+
+
+def _add_detail_record(lockbox_file, record):
+    lockbox_file.cur_lockbox.cur_batch.add_detail_record(record)
+
+
+def _add_detail_overflow_record(lockbox_file, record):
+    lockbox_file.cur_lockbox.cur_batch.add_detail_overflow_record(record)
+
+
+def _add_batch_total_record(lockbox_file, record):
+    lockbox = lockbox_file.cur_lockbox
+    batch = lockbox.cur_batch
+
+    batch.set_summary(record)
+    batch.validate()
+
+    lockbox.batches.append(batch)
+    lockbox.cur_batch = LockboxBatch()
+
+
+def _add_service_total_record(lockbox_file, record):
+    lockbox_file.cur_lockbox.total_record = record
+    lockbox_file.lockboxes.append(lockbox_file.cur_lockbox)
+    lockbox_file.cur_lockbox = None
+
+
+def _add_destination_trailer_record(lockbox_file, record):
+    lockbox_file.destination_trailer_record = record
+
+
+def _build_transitions():
+    header = (LockboxImmediateAddressHeader, _add_immediate_address_header)
+    service = (LockboxServiceRecord, _add_service_record)
+    detail_header = (LockboxDetailHeader, _add_detail_header)
+    detail = (LockboxDetailRecord, _add_detail_record)
+    overflow = (LockboxDetailOverflowRecord, _add_detail_overflow_record)
+    batch_total = (LockboxBatchTotalRecord, _add_batch_total_record)
+    service_total = (LockboxServiceTotalRecord, _add_service_total_record)
+    trailer = (LockboxDestinationTrailerRecord, _add_destination_trailer_record)
+
+    allowed = {
+        STATE_START: [
+            (header, STATE_FILE_HEADER),
+        ],
+        STATE_FILE_HEADER: [
+            (service, STATE_SERVICE),
+        ],
+        STATE_SERVICE: [
+            (detail_header, STATE_LOCKBOX),
+            (trailer, STATE_END),
+        ],
+        STATE_LOCKBOX: [
+            (detail, STATE_DETAIL),
+            (batch_total, STATE_LOCKBOX),
+            (service_total, STATE_LOCKBOX_END),
+        ],
+        STATE_DETAIL: [
+            (overflow, STATE_DETAIL),
+            (detail, STATE_DETAIL),
+            (batch_total, STATE_LOCKBOX),
+        ],
+        STATE_LOCKBOX_END: [
+            (detail_header, STATE_LOCKBOX),
+            (trailer, STATE_END),
+        ],
+        STATE_END: [],
+    }
+
+    transitions = {}
+    expected = {}
+
+    for state, state_transitions in six.iteritems(allowed):
+        for (rec_class, action), next_state in state_transitions:
+            rec_type = str(rec_class.RECORD_TYPE_NUM)
+            transitions[(state, rec_type)] = (rec_class, action, next_state)
+
+        expected[state] = sorted(
+            str(rec_class.RECORD_TYPE_NUM)
+            for (rec_class, _), _ in state_transitions
+        )
+
+    return transitions, expected
 
-class LockboxFile(object):
+
+TRANSITIONS, EXPECTED_RECORD_TYPES = _build_transitions()
+
+
+def _describe_record_type(rec_type):
+    return 'record type {} ({})'.format(rec_type, RECORD_TYPE_NAMES[rec_type])
+
+
+def _unexpected_record_error(state, rec_type):
+    expected = [
+        _describe_record_type(t) for t in EXPECTED_RECORD_TYPES[state]
+    ]
+    if not expected:
+        expected_desc = 'end of file'
+    elif len(expected) == 1:
+        expected_desc = expected[0]
+    else:
+        expected_desc = '{} or {}'.format(', '.join(expected[:-1]), expected[-1])
+
+    if rec_type is None:
+        found_desc = 'end of file'
+    elif rec_type in RECORD_TYPE_NAMES:
+        found_desc = _describe_record_type(rec_type)
+    else:
+        return LockboxParseError('unknown record type {}'.format(rec_type))
+
+    return LockboxParseError(
+        'expected {} but found {}'.format(expected_desc, found_desc)
+    )
+
+
+def _escape_line(line):
+    # lines decoded by from_bytes are unicode and may hold non-ASCII
+    # characters, which Python 2 can't format into (or str()) a native
+    # string error message, so backslash-escape them
+    if isinstance(line, six.binary_type):
+        return line
+
+    return str(line.encode('ascii', 'backslashreplace').decode('ascii'))
+
+
+class LockboxFile(JSONSerializable):
     '''A :class:`~lockbox.parser.LockboxFile` is a representation of an
     actual BAI lockbox file.
 
@@ -216,6 +581,7 @@ class LockboxFile(object):
         self.destination_trailer_record = None
 
         self.cur_lockbox = None
+        self.state = STATE_START
 
     @property
     def checks(self):
@@ -229,95 +595,86 @@ class LockboxFile(object):
 
         return checks
 
-    def validate(self):
-        for lockbox in self.lockboxes:
-            lockbox.validate()
-
-    def add_record(self, record):
-        if isinstance(record, LockboxImmediateAddressHeader):
-            if self.header_record is not None:
-                raise LockboxParseError(
-                    'only one immediate address header per file'
-                )
-
-            self.header_record = record
-        elif isinstance(record, LockboxServiceRecord):
-            if self.header_record is None:
-                raise LockboxParseError('expected immediate address header')
+    def _summary_dict(self):
+        header = self.header_record
+        processing_time = header._processing_time_raw
+
+        return {
+            'destination_id': header.destination_id,
+            'originating_trn': header.originating_trn,
+            'processing_date': _yymmdd_to_iso(header._processing_date_raw),
+            'processing_time': '{}:{}'.format(
+                processing_time[0:2],
+                processing_time[2:4],
+            ),
+        }
 
-            if self.service_record is not None:
-                raise LockboxParseError('only one service record per file')
+    def to_dict(self):
+        '''
+        Return the contents of the file as nested dicts and lists, made up
+        of only strings, numbers and ``None``, suitable for encoding as
+        JSON or msgpack.
+        '''
+        file_dict = self._summary_dict()
+        file_dict['lockboxes'] = [lb.to_dict() for lb in self.lockboxes]
 
-            self.service_record = record
-        elif isinstance(record, LockboxDetailHeader):
-            if self.service_record is None:
-                raise LockboxParseError('expected service record')
+        return file_dict
 
-            if self.cur_lockbox is not None:
-                raise LockboxParseError(
-                    'cannot have lockbox detail header before closing the '
-                    'current one'
-                )
-
-            self.cur_lockbox = Lockbox()
-            self.cur_lockbox.header_record = record
-        elif isinstance(record, LockboxServiceTotalRecord):
-            if self.cur_lockbox is None:
-                raise LockboxParseError('expected lockbox detail header')
+    def iter_json(self):
+        '''
+        Yield the JSON encoding of :meth:`to_dict` a piece at a time, so
+        that it can be streamed out without ever holding the encoding of
+        the whole file in memory.
+        '''
+        return _iter_json_object(
+            self._summary_dict(),
+            'lockboxes',
+            (lb.iter_json() for lb in self.lockboxes),
+        )
 
-            self.cur_lockbox.total_record = record
-            self.lockboxes.append(self.cur_lockbox)
-            self.cur_lockbox = None
+    def validate(self):
+        for lockbox in self.lockboxes:
+            lockbox.validate()
 
-        elif isinstance(record, LockboxDestinationTrailerRecord):
-            if self.cur_lockbox is not None:
-                raise LockboxParseError('expected batch total record')
+    def add_record(self, record):
+        rec_type = str(record.RECORD_TYPE_NUM)
+        transition = TRANSITIONS.get((self.state, rec_type))
 
-            if self.destination_trailer_record is not None:
-                raise LockboxParseError('unexpected destination trailer')
+        if transition is None:
+            raise _unexpected_record_error(self.state, rec_type)
 
-            self.destination_trailer_record = record
-        else:
-            self.cur_lockbox.add_record(record)
+        _, action, next_state = transition
+        action(self, record)
+        self.state = next_state
 
     @classmethod
     def from_lines(cls, lines):
         lines = [l.strip() for l in lines]
         lockbox_file = cls()
-
-        record_type_to_constructor = {
-            LockboxBatchTotalRecord.RECORD_TYPE_NUM: LockboxBatchTotalRecord,
-            LockboxDestinationTrailerRecord.RECORD_TYPE_NUM: LockboxDestinationTrailerRecord,
-            LockboxDetailHeader.RECORD_TYPE_NUM: LockboxDetailHeader,
-            LockboxDetailOverflowRecord.RECORD_TYPE_NUM: LockboxDetailOverflowRecord,
-            LockboxDetailRecord.RECORD_TYPE_NUM: LockboxDetailRecord,
-            LockboxImmediateAddressHeader.RECORD_TYPE_NUM: LockboxImmediateAddressHeader,
-            LockboxServiceRecord.RECORD_TYPE_NUM: LockboxServiceRecord,
-            LockboxServiceTotalRecord.RECORD_TYPE_NUM: LockboxServiceTotalRecord,
-        }
+        state = lockbox_file.state
 
         for line_num, line in enumerate(lines, start=1):
             try:
-                rec_type = int(line[0])
-
-                if rec_type not in record_type_to_constructor:
-                    raise LockboxParseError(
-                        'unknown record type {}'.format(rec_type)
-                    )
+                transition = TRANSITIONS.get((state, line[:1]))
 
-                rec = record_type_to_constructor[rec_type](line)
-                lockbox_file.add_record(rec)
-            except Exception as e:
-                if not isinstance(e, LockboxError):
-                    raise
+                if transition is None:
+                    raise _unexpected_record_error(state, line[:1])
 
+                rec_class, action, state = transition
+                action(lockbox_file, rec_class(line))
+            except LockboxError as e:
                 # if this is some lockbox-related exception,  wrap it in an exception that points
                 # to the problematic line.
                 six.raise_from(
-                    LockboxParseError('Error parsing Line {}: {} ("{}")'.format(line_num, str(e), line)),
+                    LockboxParseError('Error parsing Line {}: {} ("{}")'.format(line_num, str(e), _escape_line(line))),
                     e
                 )
 
+        lockbox_file.state = state
+
+        if state in UNFINISHED_STATES:
+            raise _unexpected_record_error(state, None)
+
         lockbox_file.validate()
         return lockbox_file
 
@@ -331,3 +688,350 @@ class LockboxFile(object):
 
         '''
         return LockboxFile.from_lines(inf.readlines())
+
+    @classmethod
+    def from_bytes(cls, data, encoding='ascii', errors='strict',
+                   record_length=None):
+        '''
+        Create a new :class:`~lockbox.parser.LockboxFile` object from the
+        undecoded contents of a file. The whole buffer is decoded in a
+        single call, so this is the fastest way to read files delivered
+        in encodings other than ASCII, such as EBCDIC (``cp037``).
+
+        :param data: The raw contents of the file, as :class:`bytes`.
+        :param encoding: The codec the file is encoded with.
+        :param errors: The codec error handling scheme, as for
+                       :meth:`bytes.decode`.
+        :param record_length: The length of each record in files without
+                              line endings. Detected from the service
+                              record if not given.
+
+        '''
+        return cls.from_lines(
+            split_records(data.decode(encoding, errors), record_length)
+        )
+
+
+# the kinds of event LockboxReader.events() yields
+EVENT_LOCKBOX_START = 'lockbox start'
+EVENT_BATCH = 'batch'
+EVENT_LOCKBOX_END = 'lockbox end'
+
+
+def _raw_int(line, location):
+    start_col, end_col = location
+
+    try:
+        return int(line[start_col:end_col])
+    except ValueError:
+        raise LockboxParseError(
+            'expected numeric field at columns {}-{}'.format(start_col, end_col)
+        )
+
+
+class LockboxReader(object):
+    '''A :class:`LockboxReader` parses a lockbox file one line at a time,
+    handing back each batch as soon as its batch total record has been
+    read rather than building a :class:`LockboxFile` of the whole file.
+
+    Lockboxes and batches which can't contain any checks matching
+    ``where`` are skipped without decoding their records: the reader
+    scans straight to the record that closes them. If ``validate`` is
+    true their totals are still checked, using the raw amounts of their
+    detail and batch total records.
+
+    :param inf: A :class:`File`-like object, or any iterable of lines.
+    :param where: A :class:`~lockbox.filters.CheckFilter`, or anything
+                  :meth:`~lockbox.filters.CheckFilter.coerce` accepts.
+    :param validate: Whether to check batch and lockbox totals.
+
+    '''
+    DETAIL_BATCH_NUMBER = LockboxDetailRecord.fields['batch_number']['location']
+    DETAIL_CHECK_AMOUNT = LockboxDetailRecord.fields['check_amount']['location']
+    BATCH_NUM_REMITTANCES = (
+        LockboxBatchTotalRecord.fields['total_number_remittances']['location']
+    )
+    BATCH_DOLLAR_TOTAL = (
+        LockboxBatchTotalRecord.fields['check_dollar_total']['location']
+    )
+
+    def __init__(self, inf, where=None, validate=True):
+        self.lines = inf
+        self.where = CheckFilter.coerce(where)
+        self.validate = validate
+
+        self.header_record = None
+        self.service_record = None
+        self.destination_trailer_record = None
+
+        self.state = STATE_START
+        self.lockbox_header = None
+        self.cur_batch = None
+        self.skipping_lockbox = False
+        self.skipping_batch = False
+
+        # running totals of the current lockbox's batch total records,
+        # and of the raw detail records in a skipped batch
+        self.lockbox_num_checks = 0
+        self.lockbox_cents = 0
+        self.batch_num_checks = 0
+        self.batch_cents = 0
+
+    def events(self):
+        '''Yield an ``(event, obj)`` tuple for the start and end of each
+        lockbox which could contain matching checks and for each batch
+        in them which could, where ``event`` is one of:
+
+        * :data:`EVENT_LOCKBOX_START` - ``obj`` is the lockbox's
+          :class:`~lockbox.records.LockboxDetailHeader`
+        * :data:`EVENT_BATCH` - ``obj`` is a :class:`LockboxBatch`
+        * :data:`EVENT_LOCKBOX_END` - ``obj`` is the lockbox's
+          :class:`~lockbox.records.LockboxServiceTotalRecord`
+
+        Lockboxes are reported even if none of their batches are.
+        '''
+        for line_num, line in enumerate(self.lines, start=1):
+            line = line.strip()
+
+            try:
+                event = self._read_line(line)
+            except LockboxError as e:
+                # point to the problematic line, as from_lines does
+                six.raise_from(
+                    LockboxParseError('Error parsing Line {}: {} ("{}")'.format(line_num, str(e), _escape_line(line))),
+                    e
+                )
+
+            if event is not None:
+                yield event
+
+        if self.state in UNFINISHED_STATES:
+            raise _unexpected_record_error(self.state, None)
+
+    def batches(self):
+        '''Yield a ``(lockbox_header, batch)`` tuple for each batch in the
+        file which could contain matching checks, where
+        ``lockbox_header`` is the batch's
+        :class:`~lockbox.records.LockboxDetailHeader` and ``batch`` is a
+        :class:`LockboxBatch`.
+        '''
+        for event, obj in self.events():
+            if event == EVENT_BATCH:
+                yield self.lockbox_header, obj
+
+    def checks(self):
+        '''Yield each :class:`Check` in the file which matches
+        ``where``.
+        '''
+        where = self.where
+
+        for _, batch in self.batches():
+            for check in batch.checks:
+                if where.matches_check(check):
+                    yield check
+
+    def _read_line(self, line):
+        # the file's structure is checked against the same TRANSITIONS
+        # table as LockboxFile.from_lines, even for skipped lines
+        rec_type = line[:1]
+        transition = TRANSITIONS.get((self.state, rec_type))
+
+        if transition is None:
+            raise _unexpected_record_error(self.state, rec_type)
+
+        rec_class, _, self.state = transition
+
+        if (
+            (self.skipping_lockbox and rec_type != '8')
+            or (self.skipping_batch and rec_type in ('4', '6', '7'))
+        ):
+            self._skip_line(rec_type, line)
+            return None
+
+        if (
+            rec_type == '6'
+            and self.where.filters_batches
+            and not self.cur_batch.details
+            and not self.where.matches_batch(
+                _raw_int(line, self.DETAIL_BATCH_NUMBER)
+            )
+        ):
+            self.skipping_batch = True
+            self._skip_line(rec_type, line)
+            return None
+
+        return self.ACTIONS[rec_class](self, rec_class(line))
+
+    def _set_header_record(self, record):
+        self.header_record = record
+
+    def _set_service_record(self, record):
+        self.service_record = record
+
+    def _set_destination_trailer_record(self, record):
+        self.destination_trailer_record = record
+
+    def _add_detail_record(self, record):
+        self.cur_batch.add_detail_record(record)
+
+    def _add_detail_overflow_record(self, record):
+        self.cur_batch.add_detail_overflow_record(record)
+
+    def _skip_line(self, rec_type, line):
+        if rec_type == '6':
+            if self.validate:
+                self.batch_num_checks += 1
+                self.batch_cents += _raw_int(line, self.DETAIL_CHECK_AMOUNT)
+        elif rec_type == '7':
+            num_checks = _raw_int(line, self.BATCH_NUM_REMITTANCES)
+            cents = _raw_int(line, self.BATCH_DOLLAR_TOTAL)
+
+            if self.validate:
+                if cents != self.batch_cents:
+                    raise LockboxConsistencyError(
+                        'batch expected dollar total ({}) does not match '
+                        'actual total ({})'.format(
+                            self.batch_cents / 100.0,
+                            cents / 100.0,
+                        )
+                    )
+
+                if num_checks != self.batch_num_checks:
+                    raise LockboxConsistencyError(
+                        'batch expected number of remittances ({}) does not '
+                        'match actual number of remittances ({})'.format(
+                            self.batch_num_checks,
+                            num_checks,
+                        )
+                    )
+
+            self.lockbox_num_checks += num_checks
+            self.lockbox_cents += cents
+            self.batch_num_checks = 0
+            self.batch_cents = 0
+            self.skipping_batch = False
+
+    def _start_lockbox(self, header_record):
+        self.lockbox_header = header_record
+        self.lockbox_num_checks = 0
+        self.lockbox_cents = 0
+
+        if not self.where.matches_lockbox(header_record):
+            self.skipping_lockbox = True
+            return None
+
+        self.cur_batch = LockboxBatch()
+        return EVENT_LOCKBOX_START, header_record
+
+    def _end_batch(self, total_record):
+        batch = self.cur_batch
+        batch.set_summary(total_record)
+
+        if self.validate:
+            batch.validate()
+
+        self.lockbox_num_checks += total_record.total_number_remittances
+        self.lockbox_cents += int(total_record._check_dollar_total_raw)
+        self.cur_batch = LockboxBatch()
+
+        if self.where.matches_batch(total_record.batch_number):
+            return EVENT_BATCH, batch
+
+        return None
+
+    def _end_lockbox(self, total_record):
+        if self.validate:
+            if total_record.total_num_checks != self.lockbox_num_checks:
+                raise LockboxConsistencyError(
+                    'expected number of checks for lockbox {} does not match actual'
+                    ' number'.format(total_record.lockbox_number)
+                )
+
+            if int(total_record._check_dollar_total_raw) != self.lockbox_cents:
+                raise LockboxConsistencyError(
+                    'expected dollar total for lockbox {} does not match actual'
+                    ' total'.format(total_record.lockbox_number)
+                )
+
+        skipped = self.skipping_lockbox
+
+        self.lockbox_header = None
+        self.cur_batch = None
+        self.skipping_lockbox = False
+
+        if skipped:
+            return None
+
+        return EVENT_LOCKBOX_END, total_record
+
+    # what to do with each record which isn't skipped, by record class.
+    # Each returns the event to hand back from events(), if any
+    ACTIONS = {
+        LockboxImmediateAddressHeader: _set_header_record,
+        LockboxServiceRecord: _set_service_record,
+        LockboxDetailHeader: _start_lockbox,
+        LockboxDetailRecord: _add_detail_record,
+        LockboxDetailOverflowRecord: _add_detail_overflow_record,
+        LockboxBatchTotalRecord: _end_batch,
+        LockboxServiceTotalRecord: _end_lockbox,
+        LockboxDestinationTrailerRecord: _set_destination_trailer_record,
+    }
+
+
+def iter_checks(inf, where=None, validate=True):
+    '''
+    Lazily yield the :class:`Check` objects in a lockbox file which match
+    ``where``, without building a :class:`LockboxFile` of the whole file.
+    Conditions on lockbox numbers, deposit dates and batch numbers are
+    used to skip over non-matching lockboxes and batches without decoding
+    them.
+
+    :param inf: A :class:`File`-like object, or any iterable of lines.
+    :param where: A :class:`~lockbox.filters.CheckFilter`, a dict of
+                  keyword arguments for one, or a callable which is
+                  passed each :class:`Check` and returns whether to
+                  include it.
+    :param validate: Whether to check batch and lockbox totals, including
+                     those of lockboxes and batches that are skipped.
+
+    '''
+    return LockboxReader(inf, where=where, validate=validate).checks()
+
+
+def _parse_one(args):
+    source, encoding = args
+
+    if hasattr(source, 'read'):
+        data = source.read()
+    else:
+        with open(source, 'rb') as inf:
+            data = inf.read()
+
+    return LockboxFile.from_bytes(data, encoding=encoding)
+
+
+def parse_files(sources, num_threads=None, encoding='ascii'):
+    '''
+    Parse many lockbox files concurrently on a pool of threads, returning
+    a list of :class:`~lockbox.parser.LockboxFile` objects in the same
+    order as ``sources``. Parsing shares no mutable state between files,
+    so no locking is needed.
+
+    The first error encountered is raised once all of the files have
+    been parsed.
+
+    :param sources: Paths of files, or :class:`File`-like objects opened
+                    in binary mode.
+    :param num_threads: The number of threads to use, defaulting to the
+                        number of CPUs.
+    :param encoding: The codec the files are encoded with.
+
+    '''
+    sources = list(sources)
+    pool = ThreadPool(min(num_threads or cpu_count(), len(sources)) or 1)
+
+    try:
+        return pool.map(_parse_one, [(s, encoding) for s in sources])
+    finally:
+        pool.close()
+        pool.join()
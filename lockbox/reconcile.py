@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.reconcile
+-----------------
+
+This module matches the checks in a lockbox file against a list of
+expected payments (open invoices, pledges, etc.).
+
+Rather than comparing every check against every receivable, the
+receivables are indexed once by amount and by reference, so each check
+only has to look at the handful of receivables that could possibly
+match it.
+
+'''
+
+import bisect
+import re
+
+from collections import defaultdict
+
+
+_memo_token_patt = re.compile(r'[\s,;:]+')
+
+
+def _to_cents(amount):
+    return int(round(amount * 100))
+
+
+def _normalize_account_number(account_number):
+    return str(account_number).strip().lstrip('0')
+
+
+def _normalize_reference(reference):
+    return str(reference).strip().upper()
+
+
+class Receivable(object):
+    '''A :class:`Receivable` is a payment that is expected to arrive in a
+    lockbox. Only ``amount`` is required; any of the other fields which
+    are given must also agree with a check for it to be considered a
+    match.
+
+    * ``id`` - an identifier for the receivable, e.g. an invoice number
+    * ``amount`` - the amount expected, in dollars
+    * ``check_number`` - the number of the check expected
+    * ``account_number`` - the account number the check is expected to
+      be drawn on
+    * ``reference`` - a reference (such as an invoice number) that is
+      expected to appear in the check's memo
+
+    '''
+    def __init__(self, id, amount, check_number=None, account_number=None,
+                 reference=None):
+        self.id = id
+        self.amount = amount
+        self.check_number = check_number
+        self.account_number = account_number
+        self.reference = reference
+
+        self.amount_cents = _to_cents(amount)
+        self._check_number = (
+            None if check_number is None else int(check_number)
+        )
+        self._account_number = (
+            None
+            if account_number is None
+            else _normalize_account_number(account_number)
+        )
+        self._reference = (
+            None if reference is None else _normalize_reference(reference)
+        )
+
+    def __repr__(self):
+        return '<Receivable {!r} {}>'.format(self.id, self.amount)
+
+
+class Match(object):
+    '''A check which matched exactly one receivable. ``exact`` is
+    ``False`` if the amounts only agree to within the tolerance.
+    '''
+    def __init__(self, check, receivable, exact):
+        self.check = check
+        self.receivable = receivable
+        self.exact = exact
+
+
+class Ambiguity(object):
+    '''A check which could match more than one receivable, or which
+    matched a receivable that another check also matched.
+    '''
+    def __init__(self, check, receivables):
+        self.check = check
+        self.receivables = receivables
+
+
+class ReconciliationResult(object):
+    def __init__(self):
+        self.matched = []
+        self.ambiguous = []
+        self.unmatched_checks = []
+        self.unmatched_receivables = []
+
+
+class ReceivableIndex(object):
+    '''Hash indexes over a collection of :class:`Receivable` objects,
+    built once and then probed for each check.
+    '''
+    def __init__(self, receivables):
+        self.receivables = list(receivables)
+        self.by_amount = defaultdict(list)
+        self.by_reference = defaultdict(list)
+
+        for receivable in self.receivables:
+            self.by_amount[receivable.amount_cents].append(receivable)
+
+            if receivable._reference is not None:
+                self.by_reference[receivable._reference].append(receivable)
+
+        self.amounts = sorted(self.by_amount)
+
+    def candidates(self, check, tolerance_cents=0):
+        '''Return the receivables which ``check`` could be a payment for,
+        as a list of ``(receivable, exact)`` tuples.
+        '''
+        cents = _to_cents(check.amount)
+
+        referenced = []
+        if self.by_reference and check.memo:
+            for token in set(_memo_token_patt.split(check.memo.upper())):
+                referenced.extend(self.by_reference.get(token, ()))
+
+        # a reference found in the memo is far more selective than the
+        # amount, so when there is one only those receivables are
+        # considered
+        if referenced:
+            pool = [
+                r for r in referenced
+                if abs(r.amount_cents - cents) <= tolerance_cents
+            ]
+        elif tolerance_cents:
+            lo = bisect.bisect_left(self.amounts, cents - tolerance_cents)
+            hi = bisect.bisect_right(self.amounts, cents + tolerance_cents)
+            pool = [
+                r
+                for amount in self.amounts[lo:hi]
+                for r in self.by_amount[amount]
+                if r._reference is None
+            ]
+        else:
+            pool = [
+                r for r in self.by_amount.get(cents, ())
+                if r._reference is None
+            ]
+
+        account_number = _normalize_account_number(check.sender_account_number)
+
+        return [
+            (r, r.amount_cents == cents)
+            for r in pool
+            if (r._check_number is None or r._check_number == check.number)
+            and (
+                r._account_number is None
+                or r._account_number == account_number
+            )
+        ]
+
+
+def _rank(candidate):
+    receivable, exact = candidate
+
+    # an exact amount beats one within the tolerance, then the more
+    # identifying fields that agreed the better
+    return (
+        exact,
+        (receivable._reference is not None)
+        + (receivable._check_number is not None)
+        + (receivable._account_number is not None),
+    )
+
+
+def reconcile(receivables, checks, amount_tolerance=0):
+    '''Match checks against expected receivables.
+
+    :param receivables: An iterable of :class:`Receivable` objects.
+    :param checks: A :class:`~lockbox.parser.LockboxFile`, or any
+                   iterable of :class:`~lockbox.parser.Check` objects.
+    :param amount_tolerance: The largest difference, in dollars, between
+                             a check's amount and a receivable's amount
+                             for them to still be considered a match.
+
+    :returns: A :class:`ReconciliationResult`.
+    '''
+    index = ReceivableIndex(receivables)
+    tolerance_cents = _to_cents(amount_tolerance)
+    checks = getattr(checks, 'checks', checks)
+
+    result = ReconciliationResult()
+    best = []
+    claims = defaultdict(int)
+
+    for check in checks:
+        candidates = index.candidates(check, tolerance_cents)
+
+        if candidates:
+            top_rank = max(_rank(c) for c in candidates)
+            candidates = [c for c in candidates if _rank(c) == top_rank]
+
+        if len(candidates) == 1:
+            claims[id(candidates[0][0])] += 1
+
+        best.append((check, candidates))
+
+    matched_ids = set()
+    for check, candidates in best:
+        if not candidates:
+            result.unmatched_checks.append(check)
+        elif len(candidates) > 1 or claims[id(candidates[0][0])] > 1:
+            result.ambiguous.append(
+                Ambiguity(check, [r for r, _ in candidates])
+            )
+        else:
+            receivable, exact = candidates[0]
+            matched_ids.add(id(receivable))
+            result.matched.append(Match(check, receivable, exact))
+
+    result.unmatched_receivables = [
+        r for r in index.receivables if id(r) not in matched_ids
+    ]
+
+    return result
@@ -31,6 +31,66 @@ class LockboxFieldType(object):
     AlphanumericOrBlank = 'alphanumericorblank'
 
 
+FIELD_TYPE_PATTERNS = {
+    LockboxFieldType.Alphanumeric: re.compile(r'''^[ A-Z0-9;:,'./()-]+$'''),
+    LockboxFieldType.Numeric: re.compile(r'^[0-9]+$'),
+    LockboxFieldType.Blank: re.compile(r'^\s*$'),
+    LockboxFieldType.AlphanumericOrBlank: re.compile(r'''^$|^[ A-Z0-9;:',./()-]+$'''),
+}
+
+
+try:
+    from types import MappingProxyType as _frozen_dict
+except ImportError:
+    # python 2 has no read-only dict view, so the best we can do is to
+    # make sure each class gets its own private copy
+    _frozen_dict = dict
+
+
+class LockboxRecordMeta(type):
+    '''Metaclass for lockbox records which, when a record class is
+    created, checks its field definitions, adds the ``record_type``
+    field and precomputes everything needed to parse a record.
+
+    This means that nothing about a record class is modified after it
+    has been created, so records can safely be parsed from many threads
+    at once.
+    '''
+    def __init__(cls, name, bases, attrs):
+        super(LockboxRecordMeta, cls).__init__(name, bases, attrs)
+
+        if 'fields' not in attrs:
+            return
+
+        fields = {}
+        for field_name, field_def in six.iteritems(attrs['fields']):
+            if field_def['type'] not in FIELD_TYPE_PATTERNS:
+                raise LockboxDefinitionError(
+                    'invalid field type found: "{}"'.format(field_def['type'])
+                )
+
+            fields[field_name] = _frozen_dict(dict(field_def))
+
+        fields['record_type'] = _frozen_dict({
+            'location': (0, 1),
+            'type':  LockboxFieldType.Numeric,
+        })
+
+        cls.fields = _frozen_dict(fields)
+        cls._field_specs = tuple(
+            (
+                field_name,
+                '_{}_raw'.format(field_name),
+                field_def['location'][0],
+                field_def['location'][1],
+                field_def['type'],
+                FIELD_TYPE_PATTERNS[field_def['type']],
+            )
+            for field_name, field_def in six.iteritems(fields)
+        )
+
+
+@six.add_metaclass(LockboxRecordMeta)
 class LockboxBaseRecord(object):
     # Valid types are listed inside the LockboxFieldType class.
 
@@ -45,7 +105,10 @@ class LockboxBaseRecord(object):
     RECORD_TYPE_NUM = None
 
     raw_record_text = ''
-    children = []
+    children = ()
+
+    # filled in by LockboxRecordMeta for classes that define 'fields'
+    _field_specs = ()
 
     def __init__(self, raw_record_text):
         if len(raw_record_text) > self.MAX_RECORD_LENGTH:
@@ -55,12 +118,8 @@ class LockboxBaseRecord(object):
 
         self.raw_record_text = raw_record_text
 
-        if hasattr(self, 'fields'):
+        if self._field_specs:
             # we can only parse if there are actually fields defined
-            self.fields['record_type'] = {
-                'location': (0,1),
-                'type':  LockboxFieldType.Numeric,
-            }
             self._parse()
 
             if hasattr(self, 'validate'):
@@ -70,23 +129,20 @@ class LockboxBaseRecord(object):
             # has already been performed by the regexps in _parse(),
             # so at this point we just create any missing fields by
             # doing self.my_field = self._my_field_raw
-            for field_name, field_def in six.iteritems(self.fields):
+            for field_name, raw_field_name, _, _, field_type, _ in self._field_specs:
                 if hasattr(self, field_name):
                     continue
 
-                raw_field_name = '_{}_raw'.format(field_name)
-
                 raw_field_val = (
                     None
-                    if field_def['type'] ==  LockboxFieldType.Blank
+                    if field_type ==  LockboxFieldType.Blank
                     else getattr(self, raw_field_name, None)
                 )
 
                 setattr(self, field_name, raw_field_val)
 
     def _parse(self):
-        for field_name, field_def in six.iteritems(self.fields):
-            raw_field_name = '_{}_raw'.format(field_name)
+        for field_name, raw_field_name, start_col, end_col, field_type, patt in self._field_specs:
             if hasattr(self, field_name):
                 raise AttributeError(
                     'LockboxRecord already has field "{}"'.format(
@@ -94,27 +150,13 @@ class LockboxBaseRecord(object):
                     )
                 )
 
-            start_col, end_col = field_def['location']
             raw_field = self.raw_record_text[start_col:end_col]
 
-            if field_def['type'] ==  LockboxFieldType.Alphanumeric:
-                patt = re.compile(r'''^[ A-Z0-9;:,'./()-]+$''')
-            elif field_def['type'] ==  LockboxFieldType.Numeric:
-                patt = re.compile(r'^[0-9]+$')
-            elif field_def['type'] ==  LockboxFieldType.Blank:
-                patt = re.compile(r'^\s*$')
-            elif field_def['type'] ==  LockboxFieldType.AlphanumericOrBlank:
-                patt = re.compile(r'''^$|^[ A-Z0-9;:',./()-]+$''')
-            else:
-                raise LockboxDefinitionError(
-                    'invalid field type found: "{}"'.format(field_def['type'])
-                )
-
             if not patt.match(raw_field):
                 raise LockboxParseError(
                     'field {} does not match expected type {}'.format(
                         field_name,
-                        field_def['type'],
+                        field_type,
                     )
                 )
 
@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+
+'''
+lockbox.sqlite
+--------------
+
+This module loads lockbox files into a normalized SQLite database.
+
+Files are read with the streaming :class:`~lockbox.parser.LockboxReader`,
+so only one batch is ever held in memory, and rows are written with
+``executemany`` in large chunks. Row ids are allocated up front so that
+child rows can be queued without waiting for their parent's insert.
+Each file is loaded in a single transaction, so a file which fails to
+parse leaves nothing behind. Every lockbox matching a filter is written
+along with its totals, even if none of its batches are.
+
+'''
+
+import sqlite3
+
+import six
+
+from .exceptions import LockboxParseError
+from .parser import (
+    EVENT_BATCH,
+    EVENT_LOCKBOX_END,
+    EVENT_LOCKBOX_START,
+    Check,
+    LockboxReader,
+    _mmddyy_to_iso,
+    _yymmdd_to_iso,
+)
+
+
+TABLES = (
+    '''
+    CREATE TABLE IF NOT EXISTS lockbox_files (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        destination_id TEXT,
+        originating_trn TEXT,
+        processing_date TEXT,
+        processing_time TEXT,
+        ultimate_dest_and_origin TEXT,
+        ref_code TEXT,
+        service_type INTEGER,
+        record_size INTEGER,
+        blocking_factor INTEGER,
+        format_code INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS lockboxes (
+        id INTEGER PRIMARY KEY,
+        file_id INTEGER NOT NULL REFERENCES lockbox_files (id),
+        lockbox_number TEXT NOT NULL,
+        deposit_date TEXT NOT NULL,
+        total_num_checks INTEGER,
+        total_amount_cents INTEGER
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS batches (
+        id INTEGER PRIMARY KEY,
+        lockbox_id INTEGER NOT NULL REFERENCES lockboxes (id),
+        batch_number INTEGER NOT NULL,
+        deposit_date TEXT NOT NULL,
+        total_num_checks INTEGER NOT NULL,
+        total_amount_cents INTEGER NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS checks (
+        id INTEGER PRIMARY KEY,
+        batch_id INTEGER NOT NULL REFERENCES batches (id),
+        item_number INTEGER NOT NULL,
+        number INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        amount_cents INTEGER NOT NULL,
+        sender TEXT NOT NULL,
+        recipient TEXT NOT NULL,
+        sender_routing_number TEXT NOT NULL,
+        sender_account_number TEXT NOT NULL
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS memos (
+        check_id INTEGER NOT NULL REFERENCES checks (id),
+        sequence_number INTEGER NOT NULL,
+        memo_line TEXT NOT NULL
+    )
+    ''',
+)
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS lockboxes_file_id ON lockboxes (file_id)',
+    'CREATE INDEX IF NOT EXISTS lockboxes_lockbox_number '
+    'ON lockboxes (lockbox_number)',
+    'CREATE INDEX IF NOT EXISTS batches_lockbox_id ON batches (lockbox_id)',
+    'CREATE INDEX IF NOT EXISTS checks_batch_id ON checks (batch_id)',
+    'CREATE INDEX IF NOT EXISTS checks_number ON checks (number)',
+    'CREATE INDEX IF NOT EXISTS checks_amount_cents ON checks (amount_cents)',
+    'CREATE INDEX IF NOT EXISTS memos_check_id ON memos (check_id)',
+)
+
+# the tables rows are queued for, in the order they must be flushed so
+# that parents are always written before their children
+INSERTS = (
+    (
+        'lockbox_files',
+        'INSERT INTO lockbox_files (id, name, destination_id, '
+        'originating_trn, processing_date, processing_time, '
+        'ultimate_dest_and_origin, ref_code, service_type, record_size, '
+        'blocking_factor, format_code) '
+        'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+    ),
+    (
+        'lockboxes',
+        'INSERT INTO lockboxes (id, file_id, lockbox_number, deposit_date) '
+        'VALUES (?, ?, ?, ?)',
+    ),
+    # a lockbox's row is written when its header is read, before its
+    # totals are known, so they are filled in once its service total
+    # record is read
+    (
+        'lockbox_totals',
+        'UPDATE lockboxes SET total_num_checks = ?, total_amount_cents = ? '
+        'WHERE id = ?',
+    ),
+    (
+        'batches',
+        'INSERT INTO batches (id, lockbox_id, batch_number, deposit_date, '
+        'total_num_checks, total_amount_cents) VALUES (?, ?, ?, ?, ?, ?)',
+    ),
+    (
+        'checks',
+        'INSERT INTO checks (id, batch_id, item_number, number, date, '
+        'amount_cents, sender, recipient, sender_routing_number, '
+        'sender_account_number) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+    ),
+    (
+        'memos',
+        'INSERT INTO memos (check_id, sequence_number, memo_line) '
+        'VALUES (?, ?, ?)',
+    ),
+)
+
+
+class SQLiteSink(object):
+    '''Writes lockbox files into a SQLite database, creating the schema if
+    it doesn't already exist.
+
+    :param database: A :class:`sqlite3.Connection`, or the path of a
+                     database file to open.
+    :param chunk_size: The number of rows to queue before they are
+                       written with a single ``executemany``.
+    :param defer_indexes: If true, indexes aren't created until
+                          :meth:`create_indexes` is called, which is
+                          faster when loading many files into a new
+                          database.
+
+    .. note:: Row ids are allocated from the largest id already in each
+              table when a file is written, so only one sink should
+              write to a database at a time.
+    '''
+    def __init__(self, database, chunk_size=10000, defer_indexes=False):
+        if isinstance(database, six.string_types):
+            database = sqlite3.connect(database)
+
+        self.connection = database
+        self.chunk_size = chunk_size
+
+        for statement in TABLES:
+            self.connection.execute(statement)
+
+        if not defer_indexes:
+            self.create_indexes()
+
+        self.connection.commit()
+
+    def create_indexes(self):
+        for statement in INDEXES:
+            self.connection.execute(statement)
+
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def write_file(self, inf, name=None, where=None, validate=True):
+        '''Parse a lockbox file and write its contents to the database in a
+        single transaction, returning the id of its ``lockbox_files`` row.
+
+        :param inf: A :class:`File`-like object, or any iterable of lines.
+        :param name: The name to record for the file, defaulting to the
+                     ``name`` of ``inf`` if it has one.
+        :param where: Only write checks matching this filter, as for
+                      :func:`~lockbox.parser.iter_checks`. The lockboxes
+                      and batches they could be in are written with
+                      their full totals.
+        :param validate: Whether to check batch and lockbox totals.
+
+        '''
+        if name is None:
+            name = getattr(inf, 'name', None)
+
+        reader = LockboxReader(inf, where=where, validate=validate)
+
+        with self.connection:
+            writer = _ChunkedWriter(self.connection, self.chunk_size)
+            file_id = writer.next_id('lockbox_files')
+            file_written = False
+            lockbox_id = None
+
+            for event, obj in reader.events():
+                if not file_written:
+                    writer.add('lockbox_files', self._file_row(file_id, name, reader))
+                    file_written = True
+
+                if event == EVENT_LOCKBOX_START:
+                    lockbox_id = writer.next_id('lockboxes')
+                    writer.add('lockboxes', (
+                        lockbox_id,
+                        file_id,
+                        obj.lockbox_number,
+                        _yymmdd_to_iso(obj._deposit_date_raw),
+                    ))
+                elif event == EVENT_BATCH:
+                    self._write_batch(writer, lockbox_id, obj, reader.where)
+                elif event == EVENT_LOCKBOX_END:
+                    writer.add('lockbox_totals', (
+                        obj.total_num_checks,
+                        int(obj._check_dollar_total_raw),
+                        lockbox_id,
+                    ))
+
+            if not file_written:
+                writer.add('lockbox_files', self._file_row(file_id, name, reader))
+
+            writer.flush()
+
+        return file_id
+
+    def _file_row(self, file_id, name, reader):
+        header = reader.header_record
+        service = reader.service_record
+
+        # a file with no lockboxes can end without the reader having
+        # complained, so make sure it had the headers the row is made of
+        if header is None:
+            raise LockboxParseError('expected immediate address header')
+
+        if service is None:
+            raise LockboxParseError('expected service record')
+
+        return (
+            file_id,
+            name,
+            header.destination_id,
+            header.originating_trn,
+            _yymmdd_to_iso(header._processing_date_raw),
+            '{}:{}'.format(
+                header._processing_time_raw[0:2],
+                header._processing_time_raw[2:4],
+            ),
+            service.ultimate_dest_and_origin,
+            service._ref_code_raw,
+            service.service_type,
+            service.record_size,
+            service.blocking_factor,
+            service.format_code,
+        )
+
+    def _write_batch(self, writer, lockbox_id, batch, where):
+        summary = batch.summary
+        batch_id = writer.next_id('batches')
+
+        writer.add('batches', (
+            batch_id,
+            lockbox_id,
+            summary.batch_number,
+            _yymmdd_to_iso(summary._deposit_date_raw),
+            summary.total_number_remittances,
+            int(summary._check_dollar_total_raw),
+        ))
+
+        for detail in batch.details:
+            # only build a Check when the filter needs one to decide
+            if where.filters_checks and not where.matches_check(Check(detail)):
+                continue
+
+            record = detail.record
+            check_id = writer.next_id('checks')
+
+            writer.add('checks', (
+                check_id,
+                batch_id,
+                record.item_number,
+                record.check_number,
+                _mmddyy_to_iso(record._check_date_raw),
+                int(record._check_amount_raw),
+                record.remitter_name,
+                record.payee_name,
+                record.transit_routing_number,
+                record.dd_account_number,
+            ))
+
+            for overflow in detail.overflow_records:
+                writer.add('memos', (
+                    check_id,
+                    overflow.overflow_sequence_number,
+                    overflow.memo_line,
+                ))
+
+
+class _ChunkedWriter(object):
+    '''Queues rows for each table and writes them with ``executemany``
+    once ``chunk_size`` rows are waiting.
+    '''
+    def __init__(self, connection, chunk_size):
+        self.connection = connection
+        self.chunk_size = chunk_size
+
+        self.rows = {table: [] for table, _ in INSERTS}
+        self.num_rows = 0
+        self.ids = {}
+
+    def next_id(self, table):
+        if table not in self.ids:
+            # table names come from INSERTS, never from user input
+            self.ids[table] = self.connection.execute(
+                'SELECT COALESCE(MAX(id), 0) FROM {}'.format(table)
+            ).fetchone()[0]
+
+        self.ids[table] += 1
+        return self.ids[table]
+
+    def add(self, table, row):
+        self.rows[table].append(row)
+        self.num_rows += 1
+
+        if self.num_rows >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for table, statement in INSERTS:
+            rows = self.rows[table]
+
+            if rows:
+                self.connection.executemany(statement, rows)
+                self.rows[table] = []
+
+        self.num_rows = 0
@@ -0,0 +1,196 @@
+import errno
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+
+from unittest import TestCase
+
+import six
+
+from lockbox import cli
+
+
+class FakePool(object):
+    '''Stands in for multiprocessing.Pool, running jobs in-process and
+    recording how it was shut down.
+    '''
+    instances = []
+
+    def __init__(self, num_workers):
+        self.calls = []
+        FakePool.instances.append(self)
+
+    def imap(self, func, jobs):
+        return (func(job) for job in jobs)
+
+    def close(self):
+        self.calls.append('close')
+
+    def terminate(self):
+        self.calls.append('terminate')
+
+    def join(self):
+        self.calls.append('join')
+
+
+class BrokenPipe(object):
+    def write(self, data):
+        raise IOError(errno.EPIPE, 'Broken pipe')
+
+    def flush(self):
+        pass
+
+
+class TestCommandLine(TestCase):
+    def setUp(self):
+        tests_dir = os.path.join(os.getcwd(), 'lockbox', 'tests')
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.valid_path = os.path.join(self.tmp_dir, 'a_valid.bai')
+        self.empty_path = os.path.join(self.tmp_dir, 'b_empty.bai')
+        self.invalid_path = os.path.join(self.tmp_dir, 'c_invalid.bai')
+
+        shutil.copy(
+            os.path.join(tests_dir, 'test_lockbox.bai'),
+            self.valid_path,
+        )
+        shutil.copy(
+            os.path.join(tests_dir, 'test_empty_lockbox.bai'),
+            self.empty_path,
+        )
+        with open(self.invalid_path, 'w') as outf:
+            outf.write('100A~CDEFGHIJ00999999911605231800\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def run_cli(self, *argv):
+        stdout = sys.stdout
+        sys.stdout = six.StringIO()
+
+        try:
+            exit_code = cli.main(list(argv))
+            output = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+
+        return exit_code, [json.loads(l) for l in output.splitlines()]
+
+    def test_expand_paths(self):
+        self.assertEqual(
+            cli.expand_paths([
+                self.tmp_dir,
+                os.path.join(self.tmp_dir, '*.bai'),
+                self.valid_path,
+            ]),
+            [self.valid_path, self.empty_path, self.invalid_path],
+        )
+
+    def test_validate(self):
+        exit_code, results = self.run_cli(
+            'validate', '--jobs', '1', self.valid_path, self.empty_path,
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_OK)
+        self.assertEqual(results, [
+            {'file': self.valid_path, 'valid': True},
+            {'file': self.empty_path, 'valid': True},
+        ])
+
+    def test_validate_invalid_file_in_parallel(self):
+        exit_code, results = self.run_cli(
+            'validate', '--jobs', '2', self.tmp_dir,
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_INVALID_FILE)
+        self.assertEqual(
+            [r['file'] for r in results],
+            [self.valid_path, self.empty_path, self.invalid_path],
+        )
+        self.assertFalse(results[2]['valid'])
+        self.assertIn('destination_id', results[2]['error'])
+
+    def test_stats(self):
+        exit_code, results = self.run_cli('stats', '-j', '1', self.valid_path)
+
+        self.assertEqual(exit_code, cli.EXIT_OK)
+        self.assertEqual(results, [{
+            'file': self.valid_path,
+            'lockboxes': 1,
+            'batches': 1,
+            'checks': 1,
+            'total_amount': 7000.0,
+        }])
+
+    def test_export(self):
+        exit_code, results = self.run_cli('export', '-j', '1', self.valid_path)
+
+        self.assertEqual(exit_code, cli.EXIT_OK)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['sender'], 'BOB E SMITH')
+        self.assertEqual(results[0]['date'], '2016-05-16')
+        self.assertEqual(results[0]['amount'], 7000.0)
+        self.assertEqual(results[0]['memo'], 'CE554')
+
+    def test_export_ebcdic(self):
+        ebcdic_path = os.path.join(self.tmp_dir, 'd_ebcdic.bai')
+        with open(self.valid_path, 'r') as inf:
+            data = inf.read().encode('cp037')
+        with open(ebcdic_path, 'wb') as outf:
+            outf.write(data)
+
+        exit_code, results = self.run_cli(
+            'export', '-j', '1', '--encoding', 'cp037', ebcdic_path,
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_OK)
+        self.assertEqual(results[0]['sender'], 'BOB E SMITH')
+
+    def test_grep(self):
+        exit_code, results = self.run_cli(
+            'grep', '-i', 'bob', '--field', 'sender', '-j', '1', self.tmp_dir,
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_INVALID_FILE)
+        self.assertEqual(results[0]['file'], self.valid_path)
+        self.assertEqual(results[0]['number'], 180)
+
+        exit_code, results = self.run_cli(
+            'grep', 'bob', '--field', 'sender', '-j', '1', self.valid_path,
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_NO_MATCHES)
+        self.assertEqual(results, [])
+
+    def test_pool_shutdown(self):
+        pool_class = multiprocessing.Pool
+        stdout = sys.stdout
+        multiprocessing.Pool = FakePool
+        FakePool.instances = []
+
+        try:
+            sys.stdout = six.StringIO()
+            cli.main(['validate', '--jobs', '2', self.tmp_dir])
+
+            # a failed write must not wait for the remaining files
+            sys.stdout = BrokenPipe()
+            with self.assertRaises(IOError):
+                cli.main(['validate', '--jobs', '2', self.tmp_dir])
+        finally:
+            multiprocessing.Pool = pool_class
+            sys.stdout = stdout
+
+        self.assertEqual(
+            [pool.calls for pool in FakePool.instances],
+            [['close', 'join'], ['terminate', 'join']],
+        )
+
+    def test_no_input_files(self):
+        exit_code, results = self.run_cli(
+            'validate', os.path.join(self.tmp_dir, '*.txt'),
+        )
+
+        self.assertEqual(exit_code, cli.EXIT_USAGE)
@@ -0,0 +1,89 @@
+from unittest import TestCase
+
+from lockbox.diff import diff_files
+from lockbox.parser import LockboxFile
+from lockbox.tests.utils import make_lockbox_lines
+
+
+class TestDiffFiles(TestCase):
+    def make_file(self, second_batch, third_lockbox=True):
+        lockboxes = [
+            (11111, '160523', [
+                [
+                    {'amount_cents': 100, 'check_number': 1},
+                    {'amount_cents': 200, 'check_number': 2, 'memo': 'A'},
+                ],
+                second_batch,
+            ]),
+            (22222, '160523', [[{'amount_cents': 300, 'check_number': 3}]]),
+        ]
+        if third_lockbox:
+            lockboxes.append(
+                (33333, '160523', [[{'amount_cents': 400, 'check_number': 4}]])
+            )
+
+        return LockboxFile.from_lines(make_lockbox_lines(lockboxes))
+
+    def test_identical_files(self):
+        old = self.make_file([{'amount_cents': 500, 'check_number': 5}])
+        new = self.make_file([{'amount_cents': 500, 'check_number': 5}])
+
+        result = diff_files(old, new)
+
+        self.assertFalse(result)
+        self.assertEqual(result.added, [])
+        self.assertEqual(result.removed, [])
+        self.assertEqual(result.modified, [])
+
+    def test_changed_files(self):
+        old = self.make_file([
+            {'amount_cents': 500, 'check_number': 5, 'memo': 'OLD MEMO'},
+            {'amount_cents': 600, 'check_number': 6},
+        ])
+        new = self.make_file(
+            [
+                {'amount_cents': 550, 'check_number': 5, 'memo': 'NEW MEMO'},
+                {'amount_cents': 600, 'check_number': 6},
+                {'amount_cents': 700, 'check_number': 7},
+            ],
+            third_lockbox=False,
+        )
+
+        result = diff_files(old, new)
+
+        self.assertTrue(result)
+        self.assertEqual([c.number for c in result.added], [7])
+        self.assertEqual([c.number for c in result.removed], [4])
+        self.assertEqual(len(result.modified), 1)
+
+        change = result.modified[0]
+        self.assertEqual(change.key, ('0011111', '160523', 2, 1))
+        self.assertEqual(change.old.number, 5)
+        self.assertEqual(change.new.number, 5)
+        self.assertEqual(change.changes, {
+            'amount': (5.0, 5.5),
+            'amount_cents': (500, 550),
+            'memo': ('OLD MEMO', 'NEW MEMO'),
+        })
+
+    def test_changes_outside_check_fields(self):
+        lines = make_lockbox_lines([
+            (11111, '160523', [[
+                {'amount_cents': 100, 'check_number': 1, 'memo': 'A'},
+            ]]),
+        ])
+        old = LockboxFile.from_lines(lines)
+
+        # renumber the overflow record, which isn't part of the check
+        lines = [
+            l[:8] + '02' + l[10:] if l.startswith('4') else l
+            for l in lines
+        ]
+        new = LockboxFile.from_lines(lines)
+
+        def sequence_number(lockbox_file):
+            detail = lockbox_file.lockboxes[0].batches[0].details[0]
+            return detail.overflow_records[0].overflow_sequence_number
+
+        self.assertEqual((sequence_number(old), sequence_number(new)), (1, 2))
+        self.assertFalse(diff_files(old, new))
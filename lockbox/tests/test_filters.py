@@ -0,0 +1,136 @@
+import datetime
+
+from unittest import TestCase
+
+from lockbox.exceptions import LockboxParseError
+from lockbox.filters import CheckFilter
+from lockbox.parser import LockboxFile, iter_checks
+from lockbox.tests.utils import make_lockbox_lines
+
+
+class TestStreamingFilters(TestCase):
+    def setUp(self):
+        self.lines = make_lockbox_lines([
+            (11111, '160523', [
+                [
+                    {'amount_cents': 1001, 'check_number': 1},
+                    {'amount_cents': 2002, 'check_number': 2, 'memo': 'A'},
+                ],
+                [{'amount_cents': 3003, 'check_number': 3}],
+            ]),
+            (22222, '160524', [
+                [{'amount_cents': 4004, 'check_number': 4}],
+                [
+                    {'amount_cents': 5005, 'check_number': 5},
+                    {'amount_cents': 6006, 'check_number': 6},
+                ],
+            ]),
+        ])
+
+    def check_numbers(self, where=None, lines=None, validate=True):
+        return [
+            c.number
+            for c in iter_checks(lines or self.lines, where, validate)
+        ]
+
+    def test_no_filter(self):
+        self.assertEqual(self.check_numbers(), [1, 2, 3, 4, 5, 6])
+        self.assertEqual(
+            self.check_numbers(),
+            [c.number for c in LockboxFile.from_lines(self.lines).checks],
+        )
+
+    def test_lockbox_number(self):
+        self.assertEqual(
+            self.check_numbers({'lockbox_numbers': 22222}),
+            [4, 5, 6],
+        )
+        self.assertEqual(
+            self.check_numbers({'lockbox_numbers': ['0011111', 33333]}),
+            [1, 2, 3],
+        )
+
+    def test_deposit_dates(self):
+        self.assertEqual(
+            self.check_numbers(
+                CheckFilter(deposit_dates=datetime.date(2016, 5, 23))
+            ),
+            [1, 2, 3],
+        )
+        self.assertEqual(
+            self.check_numbers(
+                CheckFilter(min_deposit_date=datetime.date(2016, 5, 24))
+            ),
+            [4, 5, 6],
+        )
+
+    def test_batch_number(self):
+        self.assertEqual(self.check_numbers({'batch_numbers': 2}), [3, 5, 6])
+
+    def test_amount_range_and_predicate(self):
+        self.assertEqual(
+            self.check_numbers({'min_amount': 20.02, 'max_amount': 50}),
+            [2, 3, 4],
+        )
+        self.assertEqual(
+            self.check_numbers(lambda check: check.memo == 'A'),
+            [2],
+        )
+
+    def test_skipped_lockbox_totals_are_validated(self):
+        # break the detail amount of check 1 without touching the totals
+        lines = list(self.lines)
+        lines[3] = lines[3][:7] + '0000009999' + lines[3][17:]
+
+        with self.assertRaises(LockboxParseError) as cm:
+            self.check_numbers({'lockbox_numbers': 22222}, lines)
+
+        self.assertIn('batch expected dollar total', str(cm.exception))
+
+        self.assertEqual(
+            self.check_numbers({'lockbox_numbers': 22222}, lines, False),
+            [4, 5, 6],
+        )
+
+    def test_skipped_lockbox_is_not_decoded(self):
+        # a record that would fail to parse inside a skipped lockbox
+        lines = list(self.lines)
+        lines[4] = lines[4][:20] + '~' + lines[4][21:]
+
+        with self.assertRaises(LockboxParseError):
+            self.check_numbers(lines=lines)
+
+        self.assertEqual(
+            self.check_numbers({'lockbox_numbers': 22222}, lines),
+            [4, 5, 6],
+        )
+
+    def test_structural_errors(self):
+        with self.assertRaises(LockboxParseError) as cm:
+            self.check_numbers(lines=self.lines[:-3])
+
+        self.assertIn(
+            'record type 7 (batch total record) but found end of file',
+            str(cm.exception),
+        )
+
+        # a second lockbox after the destination trailer
+        lines = self.lines + self.lines[2:-1]
+        for parse in (self.check_numbers, LockboxFile.from_lines):
+            with self.assertRaises(LockboxParseError) as cm:
+                parse(lines=lines)
+
+            self.assertIn(
+                'expected end of file but found record type 5',
+                str(cm.exception),
+            )
+
+        # structure is still checked inside lockboxes which are skipped
+        lines = self.lines[:3] + self.lines[:1] + self.lines[3:]
+        with self.assertRaises(LockboxParseError) as cm:
+            self.check_numbers({'lockbox_numbers': 22222}, lines)
+
+        self.assertIn('Error parsing Line 4: expected', str(cm.exception))
+
+        with self.assertRaises(TypeError):
+            CheckFilter.coerce(42)
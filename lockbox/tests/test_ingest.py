@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import time
+
+from unittest import TestCase
+
+from lockbox.ingest import Checkpoint, InboxWatcher
+
+
+class TestInboxWatcher(TestCase):
+    def setUp(self):
+        self.tests_dir = os.path.join(os.getcwd(), 'lockbox', 'tests')
+
+        self.tmp_dir = tempfile.mkdtemp()
+        self.inbox_dir = os.path.join(self.tmp_dir, 'inbox')
+        self.quarantine_dir = os.path.join(self.tmp_dir, 'quarantine')
+        self.checkpoint_path = os.path.join(self.tmp_dir, 'checkpoint.log')
+        os.makedirs(self.inbox_dir)
+
+        self.handled = []
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def deliver(self, test_file_name, name):
+        shutil.copy(
+            os.path.join(self.tests_dir, test_file_name),
+            os.path.join(self.inbox_dir, name),
+        )
+
+    def handle(self, path, lockbox_file):
+        self.handled.append((os.path.basename(path), len(lockbox_file.checks)))
+
+    def make_watcher(self, **kwargs):
+        kwargs.setdefault('handler', self.handle)
+
+        return InboxWatcher(
+            self.inbox_dir,
+            self.checkpoint_path,
+            self.quarantine_dir,
+            num_workers=2,
+            min_file_age=0,
+            **kwargs
+        )
+
+    def run_once(self, watcher):
+        watcher.start()
+        try:
+            num_queued = watcher.scan()
+            watcher.join()
+        finally:
+            watcher.stop()
+
+        return num_queued
+
+    def test_processes_new_files(self):
+        self.deliver('test_lockbox.bai', 'a.bai')
+        self.deliver('test_empty_lockbox.bai', 'b.bai')
+
+        watcher = self.make_watcher()
+        self.assertEqual(self.run_once(watcher), 2)
+
+        self.assertEqual(sorted(self.handled), [('a.bai', 1), ('b.bai', 0)])
+
+        metrics = watcher.metrics()
+        self.assertEqual(metrics['processed'], 2)
+        self.assertEqual(metrics['queue_depth'], 0)
+        self.assertEqual(metrics['in_flight'], 0)
+        self.assertEqual(metrics['checkpointed'], 2)
+        self.assertIsNotNone(metrics['mean_latency'])
+
+        # files that have already been processed aren't queued again
+        self.assertEqual(self.run_once(watcher), 0)
+        self.assertEqual(len(self.handled), 2)
+
+    def test_checkpoint_survives_restart(self):
+        self.deliver('test_lockbox.bai', 'a.bai')
+        self.run_once(self.make_watcher())
+
+        # a redelivery of the same contents under a new name
+        self.deliver('test_lockbox.bai', 'a-again.bai')
+        watcher = self.make_watcher()
+        self.run_once(watcher)
+
+        self.assertEqual(self.handled, [('a.bai', 1)])
+        self.assertEqual(watcher.metrics()['duplicates'], 2)
+        self.assertEqual(len(Checkpoint(self.checkpoint_path)), 1)
+
+    def test_identical_files_in_one_scan(self):
+        self.deliver('test_lockbox.bai', 'a.bai')
+        self.deliver('test_lockbox.bai', 'a-copy.bai')
+
+        def slow_handler(path, lockbox_file):
+            # keep the first copy in progress while the second is read
+            time.sleep(0.2)
+            self.handle(path, lockbox_file)
+
+        watcher = self.make_watcher(handler=slow_handler)
+        self.run_once(watcher)
+
+        self.assertEqual(len(self.handled), 1)
+        self.assertEqual(watcher.metrics()['duplicates'], 1)
+        self.assertEqual(watcher.metrics()['processed'], 1)
+        self.assertEqual(len(Checkpoint(self.checkpoint_path)), 1)
+        self.assertEqual(watcher.in_progress_hashes, set())
+
+    def test_quarantines_bad_files(self):
+        with open(os.path.join(self.inbox_dir, 'bad.bai'), 'w') as outf:
+            outf.write('100A~CDEFGHIJ00999999911605231800\n')
+
+        watcher = self.make_watcher()
+        self.run_once(watcher)
+
+        self.assertEqual(self.handled, [])
+        self.assertEqual(os.listdir(self.inbox_dir), [])
+        self.assertEqual(
+            sorted(os.listdir(self.quarantine_dir)),
+            ['bad.bai', 'bad.bai.error'],
+        )
+        self.assertEqual(watcher.metrics()['quarantined'], 1)
+        self.assertEqual(len(Checkpoint(self.checkpoint_path)), 0)
+
+    def test_processed_dir(self):
+        processed_dir = os.path.join(self.tmp_dir, 'processed')
+        self.deliver('test_lockbox.bai', 'a.bai')
+
+        self.run_once(self.make_watcher(processed_dir=processed_dir))
+
+        self.assertEqual(os.listdir(self.inbox_dir), [])
+        self.assertEqual(os.listdir(processed_dir), ['a.bai'])
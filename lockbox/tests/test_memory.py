@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+from lockbox import memory
+from lockbox.parser import LockboxFile
+from lockbox.records import (
+    LockboxDetailOverflowRecord,
+    LockboxDetailRecord,
+)
+from lockbox.tests.utils import make_lockbox_lines
+
+
+# Budgets for the memory retained by a parsed file, with some headroom
+# over what is currently used. If a change to the records pushes one of
+# these over, make sure the growth is intended before raising the budget.
+DETAIL_RECORD_BUDGET = 1400
+OVERFLOW_RECORD_BUDGET = 750
+CHECK_BUDGET = 2500
+
+
+class TestMemoryAccounting(TestCase):
+    def setUp(self):
+        self.lines = make_lockbox_lines([
+            (lockbox_number, '160523', [
+                [
+                    {
+                        'amount_cents': 100 * item_number,
+                        'check_number': item_number,
+                        'memo': 'INVOICE {}'.format(item_number),
+                    }
+                    for item_number in range(1, 101)
+                ]
+                for _ in range(5)
+            ])
+            for lockbox_number in range(1, 5)
+        ])
+        self.lockbox_file = LockboxFile.from_lines(self.lines)
+
+    def test_report(self):
+        report = memory.measure_memory(self.lockbox_file)
+
+        self.assertEqual(report.num_checks, 2000)
+        self.assertEqual(report.count_by_class['LockboxDetailRecord'], 2000)
+        self.assertEqual(report.count_by_class['Lockbox'], 4)
+        self.assertEqual(report.total_bytes, sum(report.bytes_by_class.values()))
+        self.assertGreater(report.raw_text_bytes, sum(len(l) for l in self.lines))
+        self.assertLess(report.raw_text_bytes, report.total_bytes)
+
+    def test_memory_budgets(self):
+        report = memory.measure_memory(self.lockbox_file)
+
+        self.assertLess(
+            report.bytes_per_instance(LockboxDetailRecord),
+            DETAIL_RECORD_BUDGET,
+        )
+        self.assertLess(
+            report.bytes_per_instance(LockboxDetailOverflowRecord),
+            OVERFLOW_RECORD_BUDGET,
+        )
+        self.assertLess(report.bytes_per_check, CHECK_BUDGET)
+
+    def test_trace_parse(self):
+        if memory.tracemalloc is None:
+            self.skipTest('tracemalloc is not available')
+
+        lockbox_file, retained, peak = memory.trace_parse(
+            LockboxFile.from_lines,
+            self.lines,
+        )
+
+        self.assertEqual(len(lockbox_file.checks), 2000)
+        self.assertGreater(retained, 0)
+        self.assertGreaterEqual(peak, retained)
+        self.assertLess(retained, CHECK_BUDGET * 2000)
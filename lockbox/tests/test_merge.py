@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+
+from unittest import TestCase
+
+from lockbox.exceptions import LockboxConsistencyError
+from lockbox.merge import merge_checks
+from lockbox.tests.utils import make_lockbox_lines
+
+
+class TestMergeChecks(TestCase):
+    def setUp(self):
+        # (check number, check date) for each check, by deposit date
+        self.first = make_lockbox_lines([
+            (11111, '160501', [[
+                {'amount_cents': 100, 'check_number': 1, 'check_date': '042016'},
+                {'amount_cents': 100, 'check_number': 2, 'check_date': '042816'},
+            ]]),
+            (11111, '160510', [[
+                {'amount_cents': 100, 'check_number': 3, 'check_date': '050116'},
+            ]]),
+        ])
+        self.second = make_lockbox_lines([
+            (22222, '160501', [[
+                {'amount_cents': 100, 'check_number': 11, 'check_date': '042516'},
+            ]]),
+            (22222, '160505', [[
+                {'amount_cents': 500, 'check_number': 12, 'check_date': '050116'},
+            ]]),
+        ])
+        self.third = make_lockbox_lines([
+            (33333, '160601', [[
+                {'amount_cents': 100, 'check_number': 21, 'check_date': '050116'},
+            ]]),
+        ])
+
+    def test_merge(self):
+        checks = merge_checks([self.first, self.second, self.third])
+
+        self.assertEqual(
+            [c.number for c in checks],
+            [1, 11, 2, 12, 3, 21],
+        )
+
+    def test_merge_files_with_filter(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            paths = []
+            for name, lines in [('a', self.first), ('b', self.second)]:
+                path = os.path.join(tmp_dir, name)
+                with open(path, 'w') as outf:
+                    outf.write('\n'.join(lines))
+                paths.append(path)
+
+            checks = merge_checks(paths + [[]], where={'max_amount': 1})
+
+            self.assertEqual([c.number for c in checks], [1, 11, 2, 3])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_merge_ebcdic_files(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            nl_path = os.path.join(tmp_dir, 'nl')
+            with open(nl_path, 'wb') as outf:
+                outf.write(b''.join(
+                    l.encode('cp037') + b'\x15' for l in self.first
+                ))
+
+            lf_path = os.path.join(tmp_dir, 'lf')
+            with open(lf_path, 'wb') as outf:
+                outf.write('\n'.join(self.second).encode('cp037'))
+
+            checks = merge_checks([nl_path, lf_path], encoding='cp037')
+
+            self.assertEqual([c.number for c in checks], [1, 11, 2, 12, 3])
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_unsorted_file(self):
+        unsorted = make_lockbox_lines([
+            (11111, '160510', [[{'amount_cents': 100, 'check_number': 1}]]),
+            (11111, '160501', [[{'amount_cents': 100, 'check_number': 2}]]),
+        ])
+
+        checks = merge_checks([self.first, unsorted])
+
+        with self.assertRaises(LockboxConsistencyError) as cm:
+            list(checks)
+
+        self.assertIn('not sorted', str(cm.exception))
@@ -1,9 +1,20 @@
 import datetime
+import io
+import json
 import os
 
 from unittest import TestCase
 
-from lockbox.parser import LockboxFile
+import six
+
+from lockbox.exceptions import LockboxParseError
+from lockbox.parser import (
+    RECORD_TYPE_TO_CONSTRUCTOR,
+    LockboxFile,
+    parse_files,
+)
+from lockbox.records import LockboxServiceRecord
+from lockbox.tests.utils import make_lockbox_lines
 
 
 class TestLockboxParser(TestCase):
@@ -42,3 +53,199 @@ class TestLockboxParser(TestCase):
         lockbox_file = LockboxFile.from_lines(self.empty_lockbox_lines)
 
         self.assertEqual(len(lockbox_file.checks), 0)
+
+    def test_parsing_bytes_with_crlf_line_endings(self):
+        data = '\r\n'.join(self.valid_lockbox_lines).encode('ascii')
+        lockbox_file = LockboxFile.from_bytes(data)
+
+        self.assertEqual(len(lockbox_file.checks), 1)
+        self.assertEqual(lockbox_file.checks[0].memo, 'CE554')
+
+    def test_parsing_ebcdic_bytes(self):
+        data = '\n'.join(self.valid_lockbox_lines).encode('cp037')
+        lockbox_file = LockboxFile.from_bytes(data, encoding='cp037')
+
+        self.assertEqual(len(lockbox_file.checks), 1)
+        self.assertEqual(lockbox_file.checks[0].sender, 'BOB E SMITH')
+
+    def test_parsing_ebcdic_nl_terminated_bytes(self):
+        # cp037 files often end each record with NL (0x15), not CR or LF
+        data = b''.join(
+            l.encode('cp037') + b'\x15' for l in self.valid_lockbox_lines
+        )
+        lockbox_file = LockboxFile.from_bytes(data, encoding='cp037')
+
+        self.assertEqual(len(lockbox_file.checks), 1)
+        self.assertEqual(lockbox_file.checks[0].sender, 'BOB E SMITH')
+
+    def test_parse_error_on_non_ascii_line(self):
+        lines = list(self.valid_lockbox_lines)
+        lines[3] = lines[3][:20] + u'\xa2' + lines[3][21:]
+        data = u'\n'.join(lines).encode('cp037')
+
+        with self.assertRaises(LockboxParseError) as cm:
+            LockboxFile.from_bytes(data, encoding='cp037')
+
+        self.assertIn('Error parsing Line 4', str(cm.exception))
+
+    def test_parsing_fixed_length_records(self):
+        # the service record in the test file declares a record size of 80
+        data = ''.join(
+            l.ljust(80) for l in self.empty_lockbox_lines
+        ).encode('cp037')
+        lockbox_file = LockboxFile.from_bytes(data, encoding='cp037')
+
+        self.assertEqual(len(lockbox_file.lockboxes), 1)
+        self.assertEqual(len(lockbox_file.checks), 0)
+
+        data = ''.join(
+            l.ljust(104) for l in self.valid_lockbox_lines
+        ).encode('ascii')
+        lockbox_file = LockboxFile.from_bytes(data, record_length=104)
+
+        self.assertEqual(len(lockbox_file.checks), 1)
+
+    def test_parsing_fixed_length_records_of_unknown_length(self):
+        data = ''.join(l.ljust(90) for l in self.empty_lockbox_lines)
+
+        with self.assertRaises(LockboxParseError) as cm:
+            LockboxFile.from_bytes(data.encode('ascii'))
+
+        self.assertIn('could not determine record length', str(cm.exception))
+
+    def test_parse_files_in_threads(self):
+        sources = [
+            io.BytesIO('\n'.join(make_lockbox_lines([
+                (i, '160523', [[
+                    {'amount_cents': 10000 * j + 100 * i, 'check_number': j}
+                    for j in range(1, 51)
+                ]]),
+            ])).encode('ascii'))
+            for i in range(1, 21)
+        ]
+
+        lockbox_files = parse_files(sources, num_threads=8)
+
+        self.assertEqual(len(lockbox_files), 20)
+        for i, lockbox_file in enumerate(lockbox_files, start=1):
+            self.assertEqual(
+                lockbox_file.lockboxes[0].header_record.lockbox_number,
+                '{:07d}'.format(i),
+            )
+            self.assertEqual(
+                [c.amount for c in lockbox_file.checks],
+                [100.0 * j + i for j in range(1, 51)],
+            )
+
+    def test_to_dict(self):
+        lockbox_file = LockboxFile.from_lines(self.valid_lockbox_lines)
+
+        self.assertEqual(lockbox_file.to_dict(), {
+            'destination_id': 'ABCDEFGHIJ',
+            'originating_trn': '0099999991',
+            'processing_date': '2016-05-23',
+            'processing_time': '18:00',
+            'lockboxes': [{
+                'lockbox_number': '0022222',
+                'deposit_date': '2016-05-23',
+                'total_num_checks': 1,
+                'total_amount': 7000.0,
+                'total_amount_cents': 700000,
+                'batches': [{
+                    'batch_number': 1,
+                    'deposit_date': '2016-05-23',
+                    'total_amount': 7000.0,
+                    'total_amount_cents': 700000,
+                    'checks': [{
+                        'sender': 'BOB E SMITH',
+                        'recipient': 'MY BUSINESS COMPANY',
+                        'date': '2016-05-16',
+                        'number': 180,
+                        'amount': 7000.0,
+                        'amount_cents': 700000,
+                        'memo': 'CE554',
+                        'sender_routing_number': '055002707',
+                        'sender_account_number': '0012345555',
+                    }],
+                }],
+            }],
+        })
+
+    def test_to_json(self):
+        lockbox_file = LockboxFile.from_lines(make_lockbox_lines([
+            (1, '160523', [
+                [{'amount_cents': 100}, {'amount_cents': 250, 'memo': 'X'}],
+                [],
+            ]),
+            (2, '160524', [[{'amount_cents': 300}]]),
+        ]))
+
+        self.assertEqual(
+            json.loads(lockbox_file.to_json()),
+            lockbox_file.to_dict(),
+        )
+
+        outf = six.StringIO()
+        lockbox_file.lockboxes[0].dump_json(outf)
+        self.assertEqual(
+            json.loads(outf.getvalue()),
+            lockbox_file.lockboxes[0].to_dict(),
+        )
+        self.assertEqual(
+            json.loads(lockbox_file.lockboxes[0].batches[1].to_json()),
+            {
+                'batch_number': 2,
+                'deposit_date': '2016-05-23',
+                'total_amount': 0.0,
+                'total_amount_cents': 0,
+                'checks': [],
+            },
+        )
+
+    def test_unexpected_record_type(self):
+        lines = list(self.valid_lockbox_lines)
+        # an overflow record straight after the lockbox detail header
+        lines.insert(3, lines.pop(4))
+
+        with self.assertRaises(LockboxParseError) as cm:
+            LockboxFile.from_lines(lines)
+
+        self.assertEqual(
+            str(cm.exception),
+            'Error parsing Line 4: expected record type 6 (detail record), '
+            'record type 7 (batch total record) or record type 8 (service '
+            'total record) but found record type 4 (detail overflow record) '
+            '("40010016019CE554")',
+        )
+
+    def test_unknown_record_type(self):
+        lines = list(self.valid_lockbox_lines)
+        lines[3] = 'X' + lines[3][1:]
+
+        with self.assertRaises(LockboxParseError) as cm:
+            LockboxFile.from_lines(lines)
+
+        self.assertIn('Line 4: unknown record type X', str(cm.exception))
+
+    def test_unfinished_lockbox(self):
+        with self.assertRaises(LockboxParseError) as cm:
+            LockboxFile.from_lines(self.valid_lockbox_lines[:5])
+
+        self.assertIn('but found end of file', str(cm.exception))
+
+    def test_add_record(self):
+        lockbox_file = LockboxFile()
+
+        with self.assertRaises(LockboxParseError) as cm:
+            lockbox_file.add_record(LockboxServiceRecord(self.valid_lockbox_lines[1]))
+
+        self.assertIn(
+            'expected record type 1 (immediate address header)',
+            str(cm.exception),
+        )
+
+        for line in self.valid_lockbox_lines:
+            lockbox_file.add_record(RECORD_TYPE_TO_CONSTRUCTOR[int(line[0])](line))
+
+        lockbox_file.validate()
+        self.assertEqual(lockbox_file.checks[0].memo, 'CE554')
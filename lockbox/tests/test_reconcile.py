@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+from lockbox.parser import LockboxFile
+from lockbox.reconcile import Receivable, reconcile
+from lockbox.tests.utils import make_lockbox_lines
+
+
+class TestReconcile(TestCase):
+    def setUp(self):
+        self.lockbox_file = LockboxFile.from_lines(make_lockbox_lines([
+            (22222, '160523', [[
+                {'amount_cents': 700000, 'check_number': 180},
+                {'amount_cents': 2500, 'check_number': 181},
+                {'amount_cents': 2500, 'check_number': 182},
+                {
+                    'amount_cents': 12345,
+                    'check_number': 183,
+                    'memo': 'PAYMENT FOR INV-1001 THANKS',
+                },
+                {
+                    'amount_cents': 9999,
+                    'check_number': 184,
+                    'account_number': '0000000042',
+                },
+            ]]),
+        ]))
+
+    def test_exact_amount_match(self):
+        result = reconcile(
+            [Receivable('a', 7000), Receivable('b', 1)],
+            self.lockbox_file,
+        )
+
+        self.assertEqual(len(result.matched), 1)
+        self.assertEqual(result.matched[0].check.number, 180)
+        self.assertEqual(result.matched[0].receivable.id, 'a')
+        self.assertTrue(result.matched[0].exact)
+
+        self.assertEqual([r.id for r in result.unmatched_receivables], ['b'])
+        self.assertEqual(
+            sorted(c.number for c in result.unmatched_checks),
+            [181, 182, 183, 184],
+        )
+
+    def test_identifying_fields(self):
+        result = reconcile(
+            [
+                Receivable('a', 25, check_number=182),
+                Receivable('b', 123.45, reference='inv-1001'),
+                Receivable('c', 123.45),
+                Receivable('d', 99.99, account_number='42'),
+                Receivable('e', 99.99, account_number='43'),
+            ],
+            self.lockbox_file,
+        )
+
+        self.assertEqual(
+            sorted((m.check.number, m.receivable.id) for m in result.matched),
+            [(182, 'a'), (183, 'b'), (184, 'd')],
+        )
+        self.assertEqual(
+            sorted(r.id for r in result.unmatched_receivables),
+            ['c', 'e'],
+        )
+
+    def test_ambiguous_matches(self):
+        result = reconcile(
+            [Receivable('a', 25), Receivable('b', 25), Receivable('c', 99.99)],
+            self.lockbox_file,
+        )
+
+        # both $25 checks could be either $25 receivable
+        self.assertEqual(
+            sorted(a.check.number for a in result.ambiguous),
+            [181, 182],
+        )
+        self.assertEqual(
+            sorted(r.id for r in result.ambiguous[0].receivables),
+            ['a', 'b'],
+        )
+
+        # one receivable claimed by two checks is ambiguous too
+        result = reconcile([Receivable('a', 25)], self.lockbox_file)
+
+        self.assertEqual(len(result.ambiguous), 2)
+        self.assertEqual(result.matched, [])
+
+    def test_amount_tolerance(self):
+        result = reconcile(
+            [Receivable('a', 6999.50), Receivable('b', 99.97)],
+            self.lockbox_file.checks,
+            amount_tolerance=1,
+        )
+
+        self.assertEqual(
+            sorted((m.check.number, m.receivable.id) for m in result.matched),
+            [(180, 'a'), (184, 'b')],
+        )
+        self.assertFalse(any(m.exact for m in result.matched))
@@ -2,8 +2,11 @@ import datetime
 
 from unittest import TestCase
 
-from lockbox.exceptions import LockboxParseError
+import six
+
+from lockbox.exceptions import LockboxDefinitionError, LockboxParseError
 from lockbox.records import (
+    LockboxBaseRecord,
     LockboxBatchTotalRecord,
     LockboxDestinationTrailerRecord,
     LockboxDetailHeader,
@@ -148,3 +151,35 @@ class TestRecordDefinitions(TestCase):
         rec = LockboxDetailOverflowRecord('40010016019')
 
         self.assertEqual(rec._memo_line_raw, '')
+
+    def test_fields_unchanged_by_parsing(self):
+        fields_before = {
+            k: dict(v) for k, v in LockboxDetailOverflowRecord.fields.items()
+        }
+
+        LockboxDetailOverflowRecord('40010016019CE554')
+
+        self.assertEqual(
+            {k: dict(v) for k, v in LockboxDetailOverflowRecord.fields.items()},
+            fields_before,
+        )
+        self.assertIn('record_type', fields_before)
+
+    def test_fields_are_read_only(self):
+        if six.PY2:
+            self.skipTest('python 2 has no read-only mappings')
+
+        with self.assertRaises(TypeError):
+            LockboxDetailOverflowRecord.fields['memo_line'] = {}
+
+        with self.assertRaises(TypeError):
+            LockboxDetailOverflowRecord.fields['memo_line']['type'] = 'blank'
+
+    def test_invalid_field_type(self):
+        with self.assertRaises(LockboxDefinitionError) as cm:
+            class BadRecord(LockboxBaseRecord):
+                fields = {
+                    'foo': {'location': (1, 2), 'type': 'hexadecimal'},
+                }
+
+        self.assertIn('hexadecimal', str(cm.exception))
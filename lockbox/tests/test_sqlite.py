@@ -0,0 +1,149 @@
+import sqlite3
+
+from unittest import TestCase
+
+from lockbox.exceptions import LockboxParseError
+from lockbox.sqlite import SQLiteSink
+from lockbox.tests.utils import make_lockbox_lines
+
+
+class TestSQLiteSink(TestCase):
+    def setUp(self):
+        self.connection = sqlite3.connect(':memory:')
+        self.lines = make_lockbox_lines([
+            (11111, '160523', [
+                [
+                    {'amount_cents': 1001, 'check_number': 1, 'memo': 'A' * 45},
+                    {'amount_cents': 2002, 'check_number': 2},
+                ],
+                [{'amount_cents': 3003, 'check_number': 3}],
+            ]),
+            (22222, '160524', [[{'amount_cents': 4004, 'check_number': 4}]]),
+        ])
+
+    def tearDown(self):
+        self.connection.close()
+
+    def query(self, sql):
+        return self.connection.execute(sql).fetchall()
+
+    def test_write_file(self):
+        sink = SQLiteSink(self.connection, chunk_size=3)
+
+        file_id = sink.write_file(self.lines, name='first.bai')
+        second_file_id = sink.write_file(self.lines, name='second.bai')
+
+        self.assertEqual((file_id, second_file_id), (1, 2))
+        self.assertEqual(
+            self.query('SELECT id, name, processing_date FROM lockbox_files'),
+            [(1, 'first.bai', '2016-05-23'), (2, 'second.bai', '2016-05-23')],
+        )
+        self.assertEqual(
+            self.query(
+                'SELECT lockboxes.lockbox_number, batches.batch_number, '
+                'checks.number, checks.date, checks.amount_cents '
+                'FROM checks '
+                'JOIN batches ON batches.id = checks.batch_id '
+                'JOIN lockboxes ON lockboxes.id = batches.lockbox_id '
+                'WHERE lockboxes.file_id = 2 '
+                'ORDER BY checks.id'
+            ),
+            [
+                ('0011111', 1, 1, '2016-05-16', 1001),
+                ('0011111', 1, 2, '2016-05-16', 2002),
+                ('0011111', 2, 3, '2016-05-16', 3003),
+                ('0022222', 1, 4, '2016-05-16', 4004),
+            ],
+        )
+        self.assertEqual(
+            self.query(
+                'SELECT checks.number, memos.sequence_number, memos.memo_line '
+                'FROM memos JOIN checks ON checks.id = memos.check_id '
+                'ORDER BY checks.id, memos.sequence_number'
+            ),
+            [(1, 1, 'A' * 30), (1, 2, 'A' * 15)] * 2,
+        )
+
+    def test_check_filters(self):
+        sink = SQLiteSink(self.connection)
+
+        sink.write_file(self.lines, where={'min_amount': 25})
+        self.assertEqual(
+            self.query('SELECT number FROM checks ORDER BY id'),
+            [(3,), (4,)],
+        )
+
+        sink.write_file(self.lines, where=lambda check: check.number == 1)
+        self.assertEqual(
+            self.query(
+                'SELECT number, memo_line FROM checks '
+                'JOIN memos ON memos.check_id = checks.id '
+                'WHERE checks.id > 2 ORDER BY checks.id'
+            ),
+            [(1, 'A' * 30), (1, 'A' * 15)],
+        )
+        self.assertEqual(self.query('SELECT COUNT(*) FROM checks'), [(3,)])
+
+        # every batch of a matching lockbox is still written, with its totals
+        self.assertEqual(self.query('SELECT COUNT(*) FROM batches'), [(6,)])
+
+    def test_lockboxes_without_written_batches(self):
+        sink = SQLiteSink(self.connection)
+        lines = make_lockbox_lines([(33333, '160525', [])])
+
+        sink.write_file(self.lines, where={'batch_numbers': 2})
+        sink.write_file(lines)
+
+        self.assertEqual(
+            self.query(
+                'SELECT file_id, lockbox_number, deposit_date, '
+                'total_num_checks, total_amount_cents '
+                'FROM lockboxes ORDER BY id'
+            ),
+            [
+                (1, '0011111', '2016-05-23', 3, 6006),
+                (1, '0022222', '2016-05-24', 1, 4004),
+                (2, '0033333', '2016-05-25', 0, 0),
+            ],
+        )
+        self.assertEqual(
+            self.query('SELECT lockbox_id, batch_number FROM batches'),
+            [(1, 2)],
+        )
+        self.assertEqual(
+            self.query(
+                'SELECT service_type, record_size FROM lockbox_files'
+            ),
+            [(400, 80)] * 2,
+        )
+
+    def test_failed_file_is_rolled_back(self):
+        sink = SQLiteSink(self.connection, chunk_size=1)
+        lines = self.lines[:-3]
+
+        with self.assertRaises(LockboxParseError):
+            sink.write_file(lines)
+
+        for table in ('lockbox_files', 'lockboxes', 'batches', 'checks', 'memos'):
+            self.assertEqual(self.query('SELECT COUNT(*) FROM ' + table), [(0,)])
+
+    def test_missing_headers(self):
+        sink = SQLiteSink(self.connection)
+
+        for lines in ([], self.lines[:1]):
+            with self.assertRaises(LockboxParseError):
+                sink.write_file(lines)
+
+        self.assertEqual(self.query('SELECT COUNT(*) FROM lockbox_files'), [(0,)])
+
+    def test_deferred_indexes(self):
+        index_sql = "SELECT name FROM sqlite_master WHERE type = 'index'"
+
+        sink = SQLiteSink(self.connection, defer_indexes=True)
+        sink.write_file(self.lines, where={'lockbox_numbers': 22222})
+
+        self.assertEqual(self.query(index_sql), [])
+        self.assertEqual(self.query('SELECT number FROM checks'), [(4,)])
+
+        sink.create_indexes()
+        self.assertIn(('checks_number',), self.query(index_sql))
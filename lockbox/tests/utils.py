@@ -0,0 +1,99 @@
+'''
+Helpers for generating the lines of synthetic lockbox files in tests.
+'''
+
+
+def detail_line(batch_number, item_number, amount_cents, check_number=180,
+                check_date='051616', account_number='0012345555',
+                routing_number='055002707', remitter='BOB E SMITH',
+                payee='MY BUSINESS COMPANY'):
+    return '6{:03d}{:03d}{:010d}{}{}{:010d}{}{:<30}{}'.format(
+        batch_number,
+        item_number,
+        amount_cents,
+        routing_number,
+        account_number,
+        check_number,
+        check_date,
+        remitter,
+        payee,
+    )
+
+
+def overflow_line(batch_number, item_number, sequence_number, memo_line,
+                  last=True):
+    return '4{:03d}{:03d}6{:02d}{}{}'.format(
+        batch_number,
+        item_number,
+        sequence_number,
+        9 if last else 0,
+        memo_line,
+    )
+
+
+def make_lockbox_lines(lockboxes, processing_date='160523'):
+    '''Build the lines of a complete, consistent lockbox file.
+
+    ``lockboxes`` is a list of ``(lockbox_number, deposit_date, batches)``
+    tuples, where ``batches`` is a list of lists of checks, and each
+    check is a dict of keyword arguments for :func:`detail_line` plus an
+    optional ``memo``.
+    '''
+    lines = [
+        '100ABCDEFGHIJ0099999991{}1800'.format(processing_date),
+        '2ABCDEFGHIJ0099999991000000000040008000801',
+    ]
+
+    for lockbox_number, deposit_date, batches in lockboxes:
+        lines.append('5000000{:07d}{}ABCDEFGHIJ0099999991'.format(
+            lockbox_number,
+            deposit_date,
+        ))
+
+        lockbox_checks = 0
+        lockbox_cents = 0
+
+        for batch_number, checks in enumerate(batches, start=1):
+            batch_cents = 0
+
+            for item_number, check in enumerate(checks, start=1):
+                check = dict(check)
+                memo = check.pop('memo', '')
+
+                lines.append(detail_line(batch_number, item_number, **check))
+
+                memo_lines = [
+                    memo[i:i + 30] for i in range(0, len(memo), 30)
+                ]
+                for seq, memo_line in enumerate(memo_lines, start=1):
+                    lines.append(overflow_line(
+                        batch_number,
+                        item_number,
+                        seq,
+                        memo_line,
+                        last=seq == len(memo_lines),
+                    ))
+
+                batch_cents += check['amount_cents']
+
+            lines.append('7{:03d}000{:07d}{}{:03d}{:010d}'.format(
+                batch_number,
+                lockbox_number,
+                deposit_date,
+                len(checks),
+                batch_cents,
+            ))
+
+            lockbox_checks += len(checks)
+            lockbox_cents += batch_cents
+
+        lines.append('8000000{:07d}{}{:04d}{:010d}'.format(
+            lockbox_number,
+            deposit_date,
+            lockbox_checks,
+            lockbox_cents,
+        ))
+
+    lines.append('9{:06d}'.format(len(lines) + 1))
+
+    return lines
@@ -15,6 +15,11 @@ setup(
     install_requires=[
         'six',
     ],
+    entry_points={
+        'console_scripts': [
+            'lockbox = lockbox.cli:main',
+        ],
+    },
     test_suite='nose.collector',
     tests_require=['nose', 'coverage'],
     include_package_data=True,